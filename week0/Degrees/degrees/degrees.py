@@ -1,67 +1,298 @@
+import argparse
 import csv
+import heapq
+import json
+import os
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import Graph, fingerprint
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from util import Node, StackFrontier, QueueFrontier, SearchStats
 
-# Maps names to a set of corresponding person_ids
-names = {}
+# Integer-indexed people, movies and stars of the loaded dataset
+graph = None
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# Connected components and landmark distances of the loaded dataset
+landmark_index = None
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+# Prefix and fuzzy name lookup for the loaded dataset
+name_index = None
 
+# Fingerprint of the CSV files the loaded snapshots were built from
+snapshot_stamp = None
 
-def load_data(directory):
+# Binary copies of the loaded graph and its indexes kept next to
+# the CSV files
+SNAPSHOT = "degrees.snapshot"
+LANDMARK_SNAPSHOT = "degrees.landmarks"
+NAME_SNAPSHOT = "degrees.names"
+
+# Deltas appended to the CSV files since the snapshots were built
+JOURNAL = "degrees.journal"
+
+# Journal size in bytes past which loading rebuilds the snapshots
+# instead of replaying the deltas
+COMPACT_SIZE = 16 * 1024 * 1024
+
+# Number of landmarks chosen when none are given
+LANDMARKS = 8
+
+
+def load_data(directory, landmarks=LANDMARKS, compact=False):
     """
     Load data from CSV files into memory.
+
+    The parsed graph is saved as a snapshot in `directory` and mapped
+    back in on later runs, until one of the CSV files changes, except
+    through apply_delta, whose journaled deltas are replayed instead.
+    `landmarks` is the number of landmark actors to index, or a list of
+    their IMDB ids; the index is saved alongside the graph.
+
+    If `compact` is true, or the journal has grown past COMPACT_SIZE
+    bytes, the deltas are folded in instead: the graph and its indexes
+    are rebuilt from the CSV files, which already hold the journaled
+    rows, saved as fresh snapshots, and the journal is removed.
+    """
+    global graph, landmark_index, name_index, snapshot_stamp
+    stamp = fingerprint(directory)
+    base, deltas = read_journal(directory)
+    try:
+        size = os.path.getsize(os.path.join(directory, JOURNAL))
+    except OSError:
+        size = 0
+    if compact or size > COMPACT_SIZE:
+        deltas = []
+    if deltas and deltas[-1]["fingerprint"] == stamp:
+        stamp = base
+    else:
+        deltas = []
+
+    path = os.path.join(directory, SNAPSHOT)
+    graph = Graph.load(path, stamp)
+    if graph is None:
+        stamp = fingerprint(directory)
+        deltas = []
+        graph = Graph.from_csv(directory)
+        try:
+            graph.save(path, stamp)
+            if os.path.exists(os.path.join(directory, JOURNAL)):
+                os.remove(os.path.join(directory, JOURNAL))
+        except OSError:
+            pass
+    snapshot_stamp = stamp
+
+    path = os.path.join(directory, NAME_SNAPSHOT)
+    name_index = NameIndex.load(graph, path, stamp)
+    if name_index is None:
+        name_index = NameIndex.build(graph)
+        try:
+            name_index.save(path, stamp)
+        except OSError:
+            pass
+
+    if not isinstance(landmarks, int):
+        landmarks = [
+            person for person in map(graph.person_index, landmarks)
+            if person is not None
+        ]
+    path = os.path.join(directory, LANDMARK_SNAPSHOT)
+    stamp = {"dataset": stamp, "landmarks": landmarks}
+    landmark_index = LandmarkIndex.load(path, stamp)
+    if landmark_index is None:
+        landmark_index = LandmarkIndex.build(graph, landmarks)
+        try:
+            landmark_index.save(path, stamp)
+        except OSError:
+            pass
+
+    for delta in deltas:
+        add_rows(delta["people"], delta["movies"], delta["stars"])
+
+
+def apply_delta(directory, delta_directory):
+    """
+    Adds the people, movies and stars in the CSV files of
+    `delta_directory` to the dataset loaded from `directory`.
+
+    The loaded graph and its indexes are updated in place, the rows
+    that were added are appended to the dataset's CSV files, and they
+    are journaled so later loads replay them on top of the existing
+    snapshots until load_data compacts the journal. Returns the number
+    of people, movies and stars added.
+    """
+    rows = {}
+    for filename, columns in (
+        ("people.csv", ("id", "name", "birth")),
+        ("movies.csv", ("id", "title", "year")),
+        ("stars.csv", ("person_id", "movie_id")),
+    ):
+        rows[filename] = []
+        path = os.path.join(delta_directory, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                rows[filename].append([row[column] for column in columns])
+
+    people, movies, stars = add_rows(
+        rows["people.csv"], rows["movies.csv"], rows["stars.csv"]
+    )
+
+    for filename, header, added in (
+        ("people.csv", ["id", "name", "birth"], people),
+        ("movies.csv", ["id", "title", "year"], movies),
+        ("stars.csv", ["person_id", "movie_id"], stars),
+    ):
+        if added:
+            path = os.path.join(directory, filename)
+            _append_csv(path, header, added)
+
+    path = os.path.join(directory, JOURNAL)
+    with open(path, "a", encoding="utf-8") as f:
+        if f.tell() == 0:
+            f.write(json.dumps({"base": snapshot_stamp}) + "\n")
+        f.write(json.dumps({
+            "fingerprint": fingerprint(directory),
+            "people": people,
+            "movies": movies,
+            "stars": stars,
+        }) + "\n")
+    return len(people), len(movies), len(stars)
+
+
+def add_rows(people, movies, stars):
+    """
+    Adds people as (id, name, birth) rows, movies as (id, title, year)
+    rows and stars as (person_id, movie_id) rows to the loaded graph and
+    its indexes. Rows already present, or stars of unknown people or
+    movies, are skipped. Returns the lists of people, movies and stars
+    rows that were added.
+    """
+    added_people, added_movies, added_stars = [], [], []
+    for person_id, name, birth in people:
+        person = graph.add_person(person_id, name, birth)
+        if person is not None:
+            name_index.add_person(person)
+            landmark_index.add_person(person)
+            added_people.append([person_id, name, birth])
+    for movie_id, title, year in movies:
+        if graph.add_movie(movie_id, title, year) is not None:
+            added_movies.append([movie_id, title, year])
+    for person_id, movie_id in stars:
+        person = graph.person_index(person_id)
+        movie = graph.movie_index(movie_id)
+        if person is None or movie is None:
+            continue
+        if graph.add_star(person, movie):
+            landmark_index.add_star(graph, person, movie)
+            added_stars.append([person_id, movie_id])
+    return added_people, added_movies, added_stars
+
+
+def read_journal(directory):
+    """
+    Returns the fingerprint the journal in `directory` starts from and
+    the deltas recorded in it, or (None, []) if there is no journal.
+    """
+    path = os.path.join(directory, JOURNAL)
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return None, []
+    if not entries or "base" not in entries[0]:
+        return None, []
+    return entries[0]["base"], entries[1:]
+
+
+def _append_csv(path, header, rows):
+    """
+    Appends `rows` to the CSV file at `path`, writing `header` first if
+    the file is new.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    if exists:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) not in b"\r\n"
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        if not exists:
+            writer.writerow(header)
+        elif needs_newline:
+            f.write("\n")
+        writer.writerows(rows)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two actors."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--batch", metavar="FILE",
+        help="answer JSONL or CSV name pairs from FILE ('-' for stdin)"
+    )
+    mode.add_argument(
+        "--serve", metavar="SOCKET",
+        help="answer queries on a Unix socket until interrupted"
+    )
+    mode.add_argument(
+        "--apply", metavar="DELTA",
+        help="add the people, movies and stars in the CSV files of DELTA"
+    )
+    mode.add_argument(
+        "--compact", action="store_true",
+        help="rebuild the snapshots to include every applied delta and "
+             "remove the journal (done automatically once it passes "
+             f"{COMPACT_SIZE // (1024 * 1024)} MiB)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="number of worker processes for --batch and --serve"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="include search statistics in --batch and --serve answers"
+    )
+    parser.add_argument(
+        "--landmarks", type=landmark_setting, default=LANDMARKS,
+        metavar="N|ID,ID,...",
+        help="number of landmark actors to index, or their IMDB ids"
+    )
+    args = parser.parse_args()
+    directory = args.directory
+
+    if args.batch is not None or args.serve is not None:
+        import service
+        if args.batch is not None:
+            service.run_batch(
+                directory, args.batch, args.workers, args.landmarks,
+                args.stats
+            )
+        else:
+            service.serve(
+                directory, args.serve, args.workers, args.landmarks,
+                args.stats
+            )
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, args.landmarks, args.compact)
     print("Data loaded.")
 
+    if args.compact:
+        return
+
+    if args.apply is not None:
+        people, movies, stars = apply_delta(directory, args.apply)
+        print(f"Added {people} people, {movies} movies and {stars} stars.")
+        return
+
     source = person_id_for_name(input("Name: "))
     if source is None:
         sys.exit("Person not found.")
@@ -78,19 +309,73 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def landmark_setting(value):
+    """
+    Parses the --landmarks option into a count or a list of IMDB ids.
+    """
+    if value.isdigit():
+        return int(value)
+    return [person_id.strip() for person_id in value.split(",")]
+
+
+def shortest_path(source, target, method="bidirectional", stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    By default the search grows one frontier from the source and one
+    from the target and stops when they meet. `method` can instead be
+    "bfs" for a plain breadth-first search from the source, or
+    "landmark" for an A* search guided by landmark distances.
+    Pass a SearchStats as `stats` to record how the search went.
+
     If no possible path, returns None.
     """
+    if stats is None:
+        return _shortest_path(source, target, method, None)
+    stats.start(method)
+    path = _shortest_path(source, target, method, stats)
+    stats.finish(path)
+    return path
+
+
+def _shortest_path(source, target, method, stats):
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None:
+        return None
+    if source == target:
+        return []
+    if not landmark_index.connected(source, target):
+        return None
+    if method == "bidirectional":
+        path = bidirectional_search(source, target, stats)
+    elif method == "bfs":
+        path = breadth_first_search(source, target, stats)
+    elif method == "landmark":
+        path = landmark_search(source, target, stats)
+    else:
+        raise ValueError(f"unknown search method {method!r}")
+    if path is None:
+        return None
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
+
+
+def breadth_first_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) index pairs from
+    person index source to target by expanding a single breadth-first
+    frontier from the source.
+    """
 
     num_explored = 0
 
@@ -105,13 +390,16 @@ def shortest_path(source, target):
         if frontier.empty():
             return None
 
+        if stats is not None:
+            stats.frontier(len(frontier.frontier))
+
         # Choose a node from frontier
         node = frontier.remove()
         num_explored += 1
 
         explored.add(node.state)
 
-        for action, state in neighbors_for_person(node.state):
+        for action, state in _costars(node.state, stats):
             if not frontier.contains_state(state) and state not in explored:
                 child = Node(state, node, action)
                 if child.state == target:
@@ -124,20 +412,312 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def bidirectional_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) index pairs from
+    person index source to target by expanding breadth-first layers
+    from both ends, always growing the smaller frontier, until the
+    two searches meet.
+    """
+
+    # Maps each reached person to the (movie, person) step that
+    # leads back towards the endpoint its search started from
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        if stats is not None:
+            stats.frontier(len(forward_layer) + len(backward_layer))
+
+        # Expand whichever side currently has fewer people to visit
+        expand_forward = len(forward_layer) <= len(backward_layer)
+        if expand_forward:
+            layer, visited, other = forward_layer, forward, backward
+        else:
+            layer, visited, other = backward_layer, backward, forward
+
+        next_layer = []
+        meeting = None
+        for person in layer:
+            for movie, neighbor in _costars(person, stats):
+                if neighbor in visited:
+                    continue
+                visited[neighbor] = (movie, person)
+                next_layer.append(neighbor)
+
+                # Keep the meeting point closest to the other endpoint
+                if neighbor in other and (
+                    meeting is None
+                    or _depth(other, neighbor) < _depth(other, meeting)
+                ):
+                    meeting = neighbor
+
+        if meeting is not None:
+            return _join_paths(forward, backward, meeting)
+
+        if expand_forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def landmark_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) index pairs from
+    person index source to target using A* search, with landmark lower
+    bounds on the remaining distance steering expansion towards the
+    target.
+    """
+    estimate = landmark_index.lower_bound
+    parents = {source: None}
+    depth = {source: 0}
+
+    # Order by estimated total length, then prefer deeper people
+    frontier = [(estimate(source, target), 0, source)]
+    explored = set()
+
+    while frontier:
+        if stats is not None:
+            stats.frontier(len(frontier))
+        _, negative_depth, person = heapq.heappop(frontier)
+        if person in explored:
+            continue
+        if person == target:
+            path = []
+            while parents[person] is not None:
+                movie, parent = parents[person]
+                path.append((movie, person))
+                person = parent
+            return path[::-1]
+        explored.add(person)
+
+        next_depth = -negative_depth + 1
+        for movie, neighbor in _costars(person, stats):
+            if neighbor in explored:
+                continue
+            if neighbor in depth and depth[neighbor] <= next_depth:
+                continue
+            depth[neighbor] = next_depth
+            parents[neighbor] = (movie, person)
+            heapq.heappush(frontier, (
+                next_depth + estimate(neighbor, target), -next_depth, neighbor
+            ))
+
+    return None
+
+
+def _costars(person, stats):
+    """
+    Returns the co-stars of `person` for a search, recording the
+    expansion and the time taken to list them in `stats`.
+    """
+    if stats is None:
+        return graph.costars(person)
+    start = time.perf_counter()
+    costars = list(graph.costars(person))
+    stats.neighbor_time += time.perf_counter() - start
+    stats.nodes_expanded += 1
+    return costars
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    the people with IMDB ids source and target, without searching.
+
+    Returns None if they are not connected; `upper` is None if no
+    landmark reaches them.
+    """
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None:
+        return None
+    if source == target:
+        return 0, 0
+    if not landmark_index.connected(source, target):
+        return None
+    return (
+        max(1, landmark_index.lower_bound(source, target)),
+        landmark_index.upper_bound(source, target)
+    )
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns the number of distinct shortest paths between the people
+    with IMDB ids source and target, counting paths through different
+    sequences of people; 0 if they are not connected.
+    """
+    layers = _shortest_path_layers(source, target)
+    if layers is None:
+        return 0
+    forward, backward, meeting = layers
+    return sum(forward[person][1] * backward[person][1] for person in meeting)
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every distinct shortest list of (movie_id, person_id) pairs
+    connecting the source to the target, one sequence of people at a
+    time, each step witnessed by one shared movie.
+
+    Only the distances of the people explored are kept in memory, not
+    the paths themselves.
+    """
+    layers = _shortest_path_layers(source, target)
+    if layers is None:
+        return
+    forward, backward, meeting = layers
+    target = graph.person_index(target)
+    for person in meeting:
+        for head in _layered_paths(forward, person):
+            head = head[::-1]
+            for tail in _layered_paths(backward, person):
+
+                # Each step of the tail leads away from the target, so
+                # it arrives at the person of the step after it
+                arrivals = [step[1] for step in tail[1:]] + [target]
+                path = head + [
+                    (movie, arrival)
+                    for (movie, _), arrival in zip(tail, arrivals)
+                ]
+                yield [
+                    (graph.movie_ids[movie], graph.person_ids[person])
+                    for movie, person in path
+                ]
+
+
+def _shortest_path_layers(source, target):
+    """
+    Runs a bidirectional breadth-first search between the people with
+    IMDB ids source and target, completing the layer where the two
+    sides meet.
+
+    Returns (forward, backward, meeting): dictionaries mapping each
+    person reached from either end to their (distance, path count),
+    and the people through which every shortest path passes. Returns
+    None if source and target are not connected.
+    """
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None:
+        return None
+    if source != target and not landmark_index.connected(source, target):
+        return None
+
+    forward = {source: (0, 1)}
+    backward = {target: (0, 1)}
+    if source == target:
+        return forward, backward, [source]
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        expand_forward = len(forward_layer) <= len(backward_layer)
+        if expand_forward:
+            layer, reached, other = forward_layer, forward, backward
+        else:
+            layer, reached, other = backward_layer, backward, forward
+
+        # Every person of the new layer is reached by as many shortest
+        # paths as all their neighbors in the current layer combined
+        depth = reached[layer[0]][0] + 1
+        next_layer = []
+        for person in layer:
+            count = reached[person][1]
+            for _, neighbor in graph.costars(person):
+                if neighbor not in reached:
+                    reached[neighbor] = (depth, count)
+                    next_layer.append(neighbor)
+                elif reached[neighbor][0] == depth:
+                    reached[neighbor] = (depth, reached[neighbor][1] + count)
+
+        meeting = [person for person in next_layer if person in other]
+        if meeting:
+            nearest = min(other[person][0] for person in meeting)
+            return forward, backward, [
+                person for person in meeting if other[person][0] == nearest
+            ]
+
+        if expand_forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def _layered_paths(reached, person):
+    """
+    Yields every shortest path from the root of a breadth-first search
+    to `person`, as lists of (movie, person) index pairs ordered from
+    `person` back towards the root, using only the distances `reached`.
+    """
+    depth = reached[person][0]
+    if depth == 0:
+        yield []
+        return
+    for movie, neighbor in graph.costars(person):
+        if neighbor in reached and reached[neighbor][0] == depth - 1:
+            for path in _layered_paths(reached, neighbor):
+                yield [(movie, person)] + path
+
+
+def _depth(parents, person):
+    """
+    Returns how many steps `person` is from the root of `parents`.
+    """
+    depth = 0
+    while parents[person] is not None:
+        person = parents[person][1]
+        depth += 1
+    return depth
+
+
+def _join_paths(forward, backward, meeting):
+    """
+    Rebuilds the (movie, person) path through `meeting` from the
+    parent links recorded by both halves of a bidirectional search.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, parent = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie, following = backward[person]
+        path.append((movie, following))
+        person = following
+    return path
+
+
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If `interactive` is False, ambiguous names are not resolved
+    and None is returned instead of prompting.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = [graph.person_ids[i] for i in graph.people_named(name)]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            person = graph.person_index(person_id)
+            name = graph.person_names[person]
+            birth = graph.person_births[person]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -150,16 +730,44 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def complete_name(prefix, limit=10):
+    """
+    Returns the IMDB ids of up to `limit` people whose names start
+    with `prefix`, most prolific first.
+    """
+    return [graph.person_ids[i] for i in name_index.complete(prefix, limit)]
+
+
+def suggest_names(name, limit=10):
+    """
+    Returns the IMDB ids of up to `limit` people whose names are a few
+    typos away from `name`, closest and most prolific first.
+    """
+    return [graph.person_ids[i] for i in name_index.suggest(name, limit)]
+
+
+def person_name(person_id):
+    """
+    Returns the name of the person with IMDB id `person_id`.
+    """
+    return graph.person_names[graph.person_index(person_id)]
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of the movie with IMDB id `movie_id`.
+    """
+    return graph.movie_titles[graph.movie_index(movie_id)]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie, person in graph.neighbors(graph.person_index(person_id)):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[person]))
     return neighbors
 
 
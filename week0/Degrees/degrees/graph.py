@@ -0,0 +1,567 @@
+import csv
+import json
+import mmap
+import os
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Identifies snapshot files written by Graph.save
+SNAPSHOT_MAGIC = b"DEGREES1"
+
+# Columns written to a snapshot, with the typecode of integer arrays
+# or None for string columns
+SNAPSHOT_COLUMNS = [
+    ("person_ids", None),
+    ("person_names", None),
+    ("person_births", None),
+    ("movie_ids", None),
+    ("movie_titles", None),
+    ("movie_years", None),
+    ("person_offsets", "i"),
+    ("person_movies", "i"),
+    ("movie_offsets", "i"),
+    ("movie_stars", "i"),
+    ("name_order", "i"),
+]
+
+# Total number of co-stars the co-star cache of a graph may hold
+COSTAR_CACHE_SIZE = 1 << 22
+
+
+class StringColumn():
+    """
+    A sequence of strings packed into one UTF-8 buffer.
+
+    String `i` is `data[offsets[i]:offsets[i + 1]]`, so a column costs
+    a few bytes per entry instead of a full Python object. Strings
+    appended later are kept in the `added` list after the packed ones.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self.added = []
+
+    @classmethod
+    def from_strings(cls, strings):
+        data = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(bytes(data), offsets)
+
+    @property
+    def packed(self):
+        """
+        Returns the number of strings stored in the packed buffer.
+        """
+        return len(self.offsets) - 1
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.added)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string column index out of range")
+        if i >= self.packed:
+            return self.added[i - self.packed]
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def append(self, string):
+        self.added.append(string)
+
+
+class CostarCache():
+    """
+    A least-recently-used cache of co-star lists, bounded by the total
+    number of co-stars held rather than the number of people, so a few
+    prolific actors cannot crowd out everyone else indefinitely.
+    """
+
+    def __init__(self, capacity=COSTAR_CACHE_SIZE):
+        self.capacity = capacity
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, person):
+        """
+        Returns the cached co-stars of `person`, or None.
+        """
+        with self.lock:
+            entry = self.entries.get(person)
+            if entry is not None:
+                self.entries.move_to_end(person)
+            return entry
+
+    def put(self, person, entry):
+        """
+        Caches `entry`, a (people, movies) pair of arrays, for `person`,
+        evicting the least recently used entries to make room.
+        """
+        size = len(entry[0])
+        if size > self.capacity:
+            return
+        with self.lock:
+            if person in self.entries:
+                return
+            while self.size + size > self.capacity:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted[0])
+            self.entries[person] = entry
+            self.size += size
+
+    def discard(self, person):
+        """
+        Drops the cached co-stars of `person`, if any.
+        """
+        with self.lock:
+            entry = self.entries.pop(person, None)
+            if entry is not None:
+                self.size -= len(entry[0])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class Graph():
+    """
+    Integer-indexed store for the people, movies and stars of a dataset.
+
+    People and movies are numbered from 0 in the order of their IMDB ids,
+    so an id is resolved with a binary search over `person_ids` or
+    `movie_ids`. The stars relation is kept in compressed sparse row form
+    in both directions: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of movie `m` are
+    `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    `name_order` lists every person sorted by lowercase name so that
+    name lookups are binary searches as well.
+
+    People, movies and stars added after loading, by `add_person`,
+    `add_movie` and `add_star`, are numbered after the loaded ones and
+    kept in dictionaries beside the packed arrays.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_stars, name_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.name_order = name_order
+
+        # Memory map backing the columns of a graph read from a snapshot
+        self.buffer = None
+
+        self.costar_cache = CostarCache()
+
+        # Indices, lowercase names and stars of added people and movies
+        self.added_people = {}
+        self.added_movies = {}
+        self.added_names = {}
+        self.added_person_movies = {}
+        self.added_movie_stars = {}
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a graph from the people, movies and stars CSV files
+        in `directory`.
+        """
+        # A later row with the same id replaces an earlier one
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            people = sorted({
+                row["id"]: (row["id"], row["name"], row["birth"])
+                for row in csv.DictReader(f)
+            }.values())
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            movies = sorted({
+                row["id"]: (row["id"], row["title"], row["year"])
+                for row in csv.DictReader(f)
+            }.values())
+
+        person_index = {row[0]: i for i, row in enumerate(people)}
+        movie_index = {row[0]: i for i, row in enumerate(movies)}
+
+        # Encode each (person, movie) pair as one integer, dropping
+        # duplicates and rows that refer to unknown people or movies
+        num_movies = len(movies)
+        pairs = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                pairs.add(person * num_movies + movie)
+        pairs = sorted(pairs)
+
+        person_offsets, person_movies = _compress(
+            len(people), [pair // num_movies for pair in pairs],
+            [pair % num_movies for pair in pairs]
+        )
+        movie_offsets, movie_stars = _compress(
+            num_movies, person_movies, _expand(person_offsets)
+        )
+
+        name_order = array("i", sorted(
+            range(len(people)), key=lambda i: (people[i][1].lower(), i)
+        ))
+
+        return cls(
+            StringColumn.from_strings(row[0] for row in people),
+            StringColumn.from_strings(row[1] for row in people),
+            StringColumn.from_strings(row[2] for row in people),
+            StringColumn.from_strings(row[0] for row in movies),
+            StringColumn.from_strings(row[1] for row in movies),
+            StringColumn.from_strings(row[2] for row in movies),
+            person_offsets, person_movies,
+            movie_offsets, movie_stars, name_order
+        )
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """
+        Map the snapshot at `path` into memory and return it as a graph,
+        or return None if the file is missing, unreadable, or was
+        written for a dataset with a different `fingerprint`.
+        """
+        snapshot = read_snapshot(path, fingerprint)
+        if snapshot is None:
+            return None
+        buffer, sections = snapshot
+
+        columns = []
+        try:
+            for name, typecode in SNAPSHOT_COLUMNS:
+                if typecode is None:
+                    columns.append(StringColumn(
+                        sections[f"{name}.data"],
+                        sections[f"{name}.offsets"].cast("q")
+                    ))
+                else:
+                    columns.append(sections[name].cast(typecode))
+        except (KeyError, TypeError):
+            return None
+
+        graph = cls(*columns)
+        graph.buffer = buffer
+        return graph
+
+    def save(self, path, fingerprint):
+        """
+        Write the graph to a snapshot file at `path` that Graph.load
+        can map back into memory, tagged with the dataset `fingerprint`.
+        """
+        if self.added_people or self.added_movies or self.added_person_movies:
+            raise Exception("cannot save a graph with added data")
+        sections = []
+        for name, typecode in SNAPSHOT_COLUMNS:
+            column = getattr(self, name)
+            if typecode is None:
+                sections.append((f"{name}.data", column.data))
+                sections.append((f"{name}.offsets", column.offsets))
+            else:
+                sections.append((name, column))
+        write_snapshot(path, fingerprint, sections)
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with IMDB id `person_id`,
+        or None if there is no such person.
+        """
+        if person_id in self.added_people:
+            return self.added_people[person_id]
+        return _find(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with IMDB id `movie_id`,
+        or None if there is no such movie.
+        """
+        if movie_id in self.added_movies:
+            return self.added_movies[movie_id]
+        return _find(self.movie_ids, movie_id)
+
+    def add_person(self, person_id, name, birth):
+        """
+        Adds a person and returns their index, or returns None if
+        there already is a person with IMDB id `person_id`.
+        """
+        if self.person_index(person_id) is not None:
+            return None
+        person = self.num_people
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.added_people[person_id] = person
+        self.added_names.setdefault(name.lower(), []).append(person)
+        return person
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Adds a movie and returns its index, or returns None if there
+        already is a movie with IMDB id `movie_id`.
+        """
+        if self.movie_index(movie_id) is not None:
+            return None
+        movie = self.num_movies
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        self.added_movies[movie_id] = movie
+        return movie
+
+    def add_star(self, person, movie):
+        """
+        Records that person `person` starred in movie `movie`, and
+        returns False if that was already known.
+        """
+        if movie in self.movies_of(person):
+            return False
+        self.added_person_movies.setdefault(person, array("i")).append(movie)
+        self.added_movie_stars.setdefault(movie, array("i")).append(person)
+
+        # Everyone in the movie gains a co-star
+        for star in self.stars_of(movie):
+            self.costar_cache.discard(star)
+        return True
+
+    def people_named(self, name):
+        """
+        Returns the indices of all people whose name matches `name`,
+        ignoring case.
+        """
+        name = name.lower()
+        order = self.name_order
+        key = self.name_key
+        start = bisect_left(order, name, key=key)
+        matches = []
+        for i in range(start, len(order)):
+            if key(order[i]) != name:
+                break
+            matches.append(order[i])
+        return matches + self.added_names.get(name, [])
+
+    def name_key(self, person):
+        return self.person_names[person].lower()
+
+    def movies_of(self, person):
+        """
+        Returns the indices of the movies person `person` starred in.
+        """
+        return _adjacent(
+            self.person_offsets, self.person_movies,
+            self.added_person_movies, person
+        )
+
+    def stars_of(self, movie):
+        """
+        Returns the indices of the people who starred in movie `movie`.
+        """
+        return _adjacent(
+            self.movie_offsets, self.movie_stars,
+            self.added_movie_stars, movie
+        )
+
+    def costars(self, person):
+        """
+        Returns (movie, person) index pairs for everyone other than
+        `person` who starred in a movie with them, listing each co-star
+        once with a single movie they share.
+        """
+        entry = self.costar_cache.get(person)
+        if entry is None:
+            people = array("i")
+            movies = array("i")
+            seen = {person}
+            for movie in self.movies_of(person):
+                for star in self.stars_of(movie):
+                    if star not in seen:
+                        seen.add(star)
+                        people.append(star)
+                        movies.append(movie)
+            entry = (people, movies)
+            self.costar_cache.put(person, entry)
+        return zip(entry[1], entry[0])
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for everyone who starred
+        in a movie with person `person`, including `person` itself.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+
+def fingerprint(directory):
+    """
+    Returns the size and modification time of each CSV file of the
+    dataset in `directory`, used to tell whether a snapshot is fresh.
+    """
+    result = []
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        stat = os.stat(os.path.join(directory, filename))
+        result.append([filename, stat.st_size, stat.st_mtime_ns])
+    return result
+
+
+def read_snapshot(path, fingerprint):
+    """
+    Maps the snapshot file at `path` into memory and returns the memory
+    map with a dictionary of read-only byte views of its sections, or
+    None if the file is missing, damaged, or has another `fingerprint`.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(buffer)
+    try:
+        magic = bytes(view[:len(SNAPSHOT_MAGIC)])
+        start = len(SNAPSHOT_MAGIC) + 8
+        length = int.from_bytes(view[len(SNAPSHOT_MAGIC):start], "little")
+        header = json.loads(bytes(view[start:start + length]))
+        start = _align(start + length)
+        if (magic != SNAPSHOT_MAGIC
+                or header["byteorder"] != sys.byteorder
+                or header["fingerprint"] != fingerprint):
+            return None
+        sections = {}
+        for name, (offset, size) in header["sections"].items():
+            if start + offset + size > len(view):
+                return None
+            sections[name] = view[start + offset:start + offset + size]
+    except (KeyError, TypeError, ValueError):
+        return None
+    return buffer, sections
+
+
+def write_snapshot(path, fingerprint, sections):
+    """
+    Atomically writes a snapshot file at `path` holding each buffer of
+    the (name, buffer) pairs in `sections`, tagged with `fingerprint`.
+    """
+
+    # Lay out every section on an 8-byte boundary, with offsets
+    # relative to the end of the header
+    header = {
+        "byteorder": sys.byteorder,
+        "fingerprint": fingerprint,
+        "sections": {},
+    }
+    offset = 0
+    for name, data in sections:
+        size = memoryview(data).nbytes
+        header["sections"][name] = [offset, size]
+        offset += _align(size)
+    encoded = json.dumps(header).encode("utf-8")
+    start = _align(len(SNAPSHOT_MAGIC) + 8 + len(encoded))
+
+    # Remove the partial file if writing fails, e.g. on a full disk
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(encoded).to_bytes(8, "little"))
+            f.write(encoded)
+            for name, data in sections:
+                f.seek(start + header["sections"][name][0])
+                f.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _align(size):
+    """
+    Returns `size` rounded up to a multiple of 8 bytes.
+    """
+    return (size + 7) // 8 * 8
+
+
+def _find(column, value):
+    """
+    Returns the position of `value` among the sorted packed strings
+    of `column`, or None.
+    """
+    i = bisect_left(column, value, 0, column.packed)
+    if i < column.packed and column[i] == value:
+        return i
+    return None
+
+
+def _adjacent(offsets, values, added, row):
+    """
+    Returns the values of `row` in a compressed sparse row structure,
+    followed by any values `added` to it since.
+    """
+    if row + 1 < len(offsets):
+        adjacent = values[offsets[row]:offsets[row + 1]]
+    else:
+        adjacent = values[0:0]
+    if row in added:
+        return array("i", adjacent) + added[row]
+    return adjacent
+
+
+def _compress(size, rows, columns):
+    """
+    Returns (offsets, values) arrays grouping `columns` by `rows`
+    for row indices in range(size), keeping the input order within
+    each row.
+    """
+    offsets = array("i", bytes(4 * (size + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    values = array("i", bytes(4 * len(columns)))
+    cursor = array("i", offsets[:-1])
+    for row, column in zip(rows, columns):
+        values[cursor[row]] = column
+        cursor[row] += 1
+    return offsets, values
+
+
+def _expand(offsets):
+    """
+    Returns the row index for each value of a compressed sparse row
+    structure described by `offsets`.
+    """
+    rows = array("i")
+    for row in range(len(offsets) - 1):
+        rows.extend([row] * (offsets[row + 1] - offsets[row]))
+    return rows
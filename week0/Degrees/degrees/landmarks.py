@@ -0,0 +1,261 @@
+from array import array
+
+from graph import read_snapshot, write_snapshot
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 0xFFFF
+
+
+class LandmarkIndex():
+    """
+    Connected components and landmark distances for a graph.
+
+    `components[p]` labels the connected component of person `p`, and
+    `distances[i][p]` is the number of degrees of separation between
+    `landmarks[i]` and person `p`, or UNREACHABLE. By the triangle
+    inequality these tables bound the distance between any two people
+    without searching.
+
+    Stars added to the graph afterwards are folded in by `add_star`,
+    which records merged components and shortened distances in
+    dictionaries beside the tables rather than rewriting them.
+    """
+
+    def __init__(self, components, landmarks, distances):
+        self.components = components
+        self.landmarks = landmarks
+        self.distances = distances
+
+        # Memory map backing the tables of an index read from disk
+        self.buffer = None
+
+        # Labels of people added since the tables were built, the label
+        # each merged component now belongs to, and updated distances
+        # from each landmark
+        self.added_labels = {}
+        self.merged = {}
+        self.updated = [{} for _ in distances]
+
+    @classmethod
+    def build(cls, graph, landmarks):
+        """
+        Label the components of `graph` and measure distances from
+        `landmarks`, which is either a list of person indices or the
+        number of landmarks to choose.
+
+        Chosen landmarks start from the person with the most movies,
+        then repeatedly add whoever in that component is farthest from
+        every landmark picked so far.
+        """
+        components = label_components(graph)
+
+        if isinstance(landmarks, int):
+            count = min(landmarks, graph.num_people)
+            chosen = []
+            distances = []
+            if count:
+                chosen.append(max(
+                    range(graph.num_people),
+                    key=lambda p: len(graph.movies_of(p))
+                ))
+            while chosen:
+                distances.append(distances_from(graph, chosen[-1]))
+                if len(chosen) == count:
+                    break
+                component = components[chosen[0]]
+                farthest, best = None, 0
+                for person in range(graph.num_people):
+                    if components[person] != component:
+                        continue
+                    nearest = min(table[person] for table in distances)
+                    if nearest > best:
+                        farthest, best = person, nearest
+                if farthest is None:
+                    break
+                chosen.append(farthest)
+        else:
+            chosen = list(landmarks)
+            distances = [distances_from(graph, person) for person in chosen]
+
+        return cls(components, array("i", chosen), distances)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """
+        Map a saved index into memory, or return None if it is missing
+        or was built for a different `fingerprint`.
+        """
+        snapshot = read_snapshot(path, fingerprint)
+        if snapshot is None:
+            return None
+        buffer, sections = snapshot
+        try:
+            landmarks = sections["landmarks"].cast("i")
+            index = cls(
+                sections["components"].cast("i"), landmarks,
+                [sections[f"distances.{i}"].cast("H")
+                 for i in range(len(landmarks))]
+            )
+        except (KeyError, TypeError):
+            return None
+        index.buffer = buffer
+        return index
+
+    def save(self, path, fingerprint):
+        """
+        Write the index to `path`, tagged with the dataset `fingerprint`.
+        """
+        if self.added_labels or self.merged or any(self.updated):
+            raise Exception("cannot save a landmark index with added data")
+        sections = [
+            ("components", self.components),
+            ("landmarks", self.landmarks),
+        ]
+        for i, table in enumerate(self.distances):
+            sections.append((f"distances.{i}", table))
+        write_snapshot(path, fingerprint, sections)
+
+    def component(self, person):
+        """
+        Returns the label of the connected component of `person`.
+        """
+        if person < len(self.components):
+            label = self.components[person]
+        else:
+            label = self.added_labels[person]
+        while label in self.merged:
+            label = self.merged[label]
+        return label
+
+    def connected(self, a, b):
+        """
+        Returns True if people `a` and `b` are in the same component.
+        """
+        return self.component(a) == self.component(b)
+
+    def distance(self, i, person):
+        """
+        Returns the distance between landmark `i` and `person`,
+        or UNREACHABLE.
+        """
+        updated = self.updated[i]
+        if person in updated:
+            return updated[person]
+        if person < len(self.components):
+            return self.distances[i][person]
+        return UNREACHABLE
+
+    def lower_bound(self, a, b):
+        """
+        Returns a lower bound on the distance between connected
+        people `a` and `b`.
+        """
+        bound = 0
+        for i in range(len(self.distances)):
+            da, db = self.distance(i, a), self.distance(i, b)
+            if da != UNREACHABLE and db != UNREACHABLE:
+                bound = max(bound, abs(da - db))
+        return bound
+
+    def upper_bound(self, a, b):
+        """
+        Returns an upper bound on the distance between connected
+        people `a` and `b`, or None if no landmark reaches both.
+        """
+        bound = None
+        for i in range(len(self.distances)):
+            da, db = self.distance(i, a), self.distance(i, b)
+            if da != UNREACHABLE and db != UNREACHABLE:
+                if bound is None or da + db < bound:
+                    bound = da + db
+        return bound
+
+    def add_person(self, person):
+        """
+        Gives a person added to the graph a component of their own.
+        """
+        self.added_labels[person] = person
+
+    def add_star(self, graph, person, movie):
+        """
+        Updates components and distances after `graph` records that
+        `person` starred in `movie`.
+        """
+        stars = graph.stars_of(movie)
+
+        # The other stars already share a component; join it
+        label = self.component(person)
+        for star in stars:
+            other = self.component(star)
+            if other != label:
+                self.merged[max(label, other)] = min(label, other)
+                break
+
+        # Shorten distances through the movie, then let the shorter
+        # distances spread to everyone they now lead to
+        for i in range(len(self.distances)):
+            nearest = min(self.distance(i, star) for star in stars)
+            if nearest == UNREACHABLE:
+                continue
+            changed = []
+            for star in stars:
+                if self.distance(i, star) > nearest + 1:
+                    self.updated[i][star] = nearest + 1
+                    changed.append(star)
+            for changed_person in changed:
+                depth = self.distance(i, changed_person) + 1
+                for other_movie in graph.movies_of(changed_person):
+                    for star in graph.stars_of(other_movie):
+                        if self.distance(i, star) > depth:
+                            self.updated[i][star] = depth
+                            changed.append(star)
+
+
+def label_components(graph):
+    """
+    Returns an array giving each person of `graph` the index of the
+    lowest-numbered person in its connected component.
+    """
+    components = array("i", [-1]) * graph.num_people
+    seen_movies = bytearray(graph.num_movies)
+    for root in range(graph.num_people):
+        if components[root] != -1:
+            continue
+        components[root] = root
+        queue = [root]
+        for person in queue:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_of(movie):
+                    if components[star] == -1:
+                        components[star] = root
+                        queue.append(star)
+    return components
+
+
+def distances_from(graph, source):
+    """
+    Returns an array of the degrees of separation between person
+    `source` and every person of `graph`.
+    """
+    distances = array("H", [UNREACHABLE]) * graph.num_people
+    seen_movies = bytearray(graph.num_movies)
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_of(movie):
+                    if distances[star] == UNREACHABLE:
+                        distances[star] = min(depth, UNREACHABLE - 1)
+                        next_layer.append(star)
+        layer = next_layer
+    return distances
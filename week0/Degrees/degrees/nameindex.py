@@ -0,0 +1,361 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from graph import StringColumn, read_snapshot, write_snapshot
+
+# Length of the character n-grams indexed for fuzzy matching
+GRAM = 3
+
+# Padding added around names so that their ends form n-grams too
+PAD = "\0" * (GRAM - 1)
+
+# Largest edit distance suggest() accepts by default
+MAX_DISTANCE = 2
+
+# Prefixes matching more people than this are completed by reading
+# people in order of popularity instead of every match
+POPULAR_SCAN = 1024
+
+# Roughly how many posting entries suggest() reads in the time it takes
+# to check one name's edit distance
+CHECK_COST = 256
+
+# Version of the saved index layout, part of its snapshot fingerprint
+FORMAT = 2
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy lookup of people by name.
+
+    Prefix completion reads a range of the graph's sorted `name_order`,
+    or for short prefixes, `popular`: every person, most prolific
+    first. Fuzzy lookup uses trigram postings split by name length:
+    the slice `postings[offsets[i]:offsets[i + 1]]` lists, in
+    increasing order, every person whose lowercase name has the
+    length and contains the trigram in key `grams[i]` (see
+    `posting_key`), with `grams` sorted for binary search. People
+    added later are indexed in the `added` postings dictionary instead.
+    """
+
+    def __init__(self, graph, grams, offsets, postings, popular):
+        self.graph = graph
+        self.grams = grams
+        self.offsets = offsets
+        self.postings = postings
+        self.popular = popular
+
+        # Memory map backing the postings of an index read from disk
+        self.buffer = None
+
+        # People indexed since the postings were built
+        self.added_people = []
+        self.added = {}
+
+    @classmethod
+    def build(cls, graph):
+        """
+        Index the trigrams of every name in `graph`.
+        """
+        index = {}
+        for person in range(graph.num_people):
+            name = graph.person_names[person].lower()
+            for gram in set(grams_of(name)):
+                key = posting_key(gram, len(name))
+                if key not in index:
+                    index[key] = array("i")
+                index[key].append(person)
+
+        grams = sorted(index)
+        offsets = array("q", [0])
+        postings = array("i")
+        for gram in grams:
+            postings.extend(index[gram])
+            offsets.append(len(postings))
+
+        # Ties keep name order, as completing a narrow prefix does
+        rank = array("i", bytes(4 * graph.num_people))
+        for i, person in enumerate(graph.name_order):
+            rank[person] = i
+        popular = array("i", sorted(
+            range(graph.num_people),
+            key=lambda person: (-len(graph.movies_of(person)), rank[person])
+        ))
+        return cls(
+            graph, StringColumn.from_strings(grams), offsets, postings,
+            popular
+        )
+
+    @classmethod
+    def load(cls, graph, path, fingerprint):
+        """
+        Map a saved index for `graph` into memory, or return None if it
+        is missing or was built for a different `fingerprint`.
+        """
+        snapshot = read_snapshot(
+            path, {"dataset": fingerprint, "format": FORMAT}
+        )
+        if snapshot is None:
+            return None
+        buffer, sections = snapshot
+        try:
+            index = cls(
+                graph,
+                StringColumn(
+                    sections["grams.data"], sections["grams.offsets"].cast("q")
+                ),
+                sections["offsets"].cast("q"),
+                sections["postings"].cast("i"),
+                sections["popular"].cast("i")
+            )
+        except (KeyError, TypeError):
+            return None
+        index.buffer = buffer
+        return index
+
+    def save(self, path, fingerprint):
+        """
+        Write the index to `path`, tagged with the dataset `fingerprint`.
+        """
+        if self.added_people:
+            raise Exception("cannot save a name index with added data")
+        write_snapshot(path, {"dataset": fingerprint, "format": FORMAT}, [
+            ("grams.data", self.grams.data),
+            ("grams.offsets", self.grams.offsets),
+            ("offsets", self.offsets),
+            ("postings", self.postings),
+            ("popular", self.popular),
+        ])
+
+    def add_person(self, person):
+        """
+        Indexes the name of a person added to the graph.
+        """
+        self.added_people.append(person)
+        name = self.graph.person_names[person].lower()
+        for gram in set(grams_of(name)):
+            key = posting_key(gram, len(name))
+            self.added.setdefault(key, array("i")).append(person)
+
+    def popularity(self, person):
+        """
+        Returns the number of movies person `person` starred in.
+        """
+        return len(self.graph.movies_of(person))
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` people whose names start with `prefix`,
+        ignoring case, with the most prolific first.
+        """
+        prefix = prefix.lower()
+        order = self.graph.name_order
+        key = self.graph.name_key
+        start = bisect_left(order, prefix, key=key)
+        end = bisect_left(order, prefix + "\U0010ffff", lo=start, key=key)
+        if end - start > POPULAR_SCAN:
+            matches = self.complete_popular(prefix, limit, end - start)
+            if matches is not None:
+                return matches
+        matches = [order[i] for i in range(start, end)]
+        matches.extend(
+            person for person in self.added_people
+            if key(person).startswith(prefix)
+        )
+        return heapq.nlargest(limit, matches, key=self.popularity)
+
+    def complete_popular(self, prefix, limit, steps):
+        """
+        Returns what complete would for a lowercase `prefix` by reading
+        `popular` until `limit` people match, or None if that takes
+        more than `steps` people.
+        """
+        key = self.graph.name_key
+
+        # People who starred in added movies may now rank higher than
+        # `popular` says, so they are considered separately
+        changed = self.graph.added_person_movies
+        found = []
+        for person in self.popular[:steps]:
+            if person not in changed and key(person).startswith(prefix):
+                found.append(person)
+                if len(found) == limit:
+                    break
+        else:
+            return None
+
+        base = len(self.popular)
+        found.extend(
+            person for person in changed
+            if person < base and key(person).startswith(prefix)
+        )
+        found.sort(key=lambda person: (key(person), person))
+        found.extend(
+            person for person in self.added_people
+            if key(person).startswith(prefix)
+        )
+        return heapq.nlargest(limit, found, key=self.popularity)
+
+    def suggest(self, name, limit=10, max_distance=MAX_DISTANCE):
+        """
+        Returns up to `limit` people whose names are within
+        `max_distance` edits of `name`, ignoring case, ordered by
+        distance and then with the most prolific first.
+        """
+        name = name.lower()
+        grams = set(grams_of(name))
+
+        # Each edit removes at most GRAM of the query's n-grams, so a
+        # name k edits away shares at least len(grams) - GRAM * k of
+        # them; keep that positive by allowing fewer edits for very
+        # short names
+        max_distance = max(0, min(max_distance, (len(grams) - 1) // GRAM))
+        needed = len(grams) - GRAM * max_distance
+
+        # Names that close differ in length by at most max_distance too
+        lengths = range(
+            max(1, len(name) - max_distance), len(name) + max_distance + 1
+        )
+        postings = {
+            gram: [self.posting(gram, length) for length in lengths]
+            for gram in grams
+        }
+        grams = sorted(
+            grams, key=lambda gram: sum(map(len, postings[gram]))
+        )
+
+        # Any match contains at least one of the rarest n-grams, so
+        # count those for every name containing one. Then count each
+        # common n-gram, rarest first, only for the names that could
+        # still reach `needed`, until checking those names directly
+        # is quicker than reading the rest of the postings
+        rare = len(grams) - needed + 1
+        shared = Counter()
+        for gram in grams[:rare]:
+            for posting in postings[gram]:
+                shared.update(posting)
+        viable = set(shared)
+        left = len(grams) - rare
+        for gram in grams[rare:]:
+            viable = {
+                person for person in viable if shared[person] + left >= needed
+            }
+            if len(viable) * CHECK_COST < sum(map(len, postings[gram])):
+                break
+            left -= 1
+            for posting in postings[gram]:
+                shared.update(viable.intersection(posting))
+
+        # Names sharing fewer n-grams cannot be closer, so check the
+        # names that may share the most first, and stop once `limit`
+        # matches are closer than any of the names left could be
+        candidates = sorted(
+            ((shared[person] + left, person) for person in viable
+             if shared[person] + left >= needed),
+            reverse=True
+        )
+        found = [0] * (max_distance + 1)
+        distances = {}
+        matches = []
+        for count, person in candidates:
+            closest = -(-(len(grams) - count) // GRAM)
+            if sum(found[:closest]) >= limit:
+                break
+            other = self.graph.person_names[person].lower()
+            if other not in distances:
+                distances[other] = edit_distance(name, other, max_distance)
+            distance = distances[other]
+            if distance is not None:
+                found[distance] += 1
+                matches.append((distance, -self.popularity(person), person))
+        return [person for _, _, person in heapq.nsmallest(limit, matches)]
+
+    def posting(self, gram, length):
+        """
+        Returns the people whose names are `length` characters long and
+        contain `gram`.
+        """
+        key = posting_key(gram, length)
+        i = bisect_left(self.grams, key)
+        if i == len(self.grams) or self.grams[i] != key:
+            posting = self.postings[0:0]
+        else:
+            posting = self.postings[self.offsets[i]:self.offsets[i + 1]]
+        if key in self.added:
+            return array("i", posting) + self.added[key]
+        return posting
+
+
+def grams_of(name):
+    """
+    Returns the padded character n-grams of `name`.
+    """
+    padded = PAD + name + PAD
+    return [padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)]
+
+
+def posting_key(gram, length):
+    """
+    Returns the key of the postings of names `length` characters long
+    that contain `gram`.
+    """
+    return f"{gram}{length}"
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between `a` and `b`,
+    or None if it is greater than `limit`.
+
+    After dropping any shared prefix and suffix, uses Myers'
+    bit-parallel algorithm: bit i of `up` and `down` says
+    whether the distance of the first i + 1 characters of `a` to the
+    prefix of `b` read so far goes up or down from the first i
+    characters, so each character of `b` updates a whole column of the
+    dynamic programming table with a few integer operations.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+
+    # A shared prefix or suffix never needs editing
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while (end < len(a) - start and end < len(b) - start
+           and a[-1 - end] == b[-1 - end]):
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        return max(len(a), len(b))
+
+    matches = {}
+    for i, c in enumerate(a):
+        matches[c] = matches.get(c, 0) | 1 << i
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    up, down, distance = mask, 0, len(a)
+    remaining = len(b)
+    for c in b:
+        match = matches.get(c, 0)
+        vertical = match | down
+        horizontal = (((match & up) + up) ^ up) | match
+        rises = down | ~(horizontal | up)
+        falls = up & horizontal
+        if rises & last:
+            distance += 1
+        elif falls & last:
+            distance -= 1
+
+        # Each remaining character changes the distance by at most one
+        remaining -= 1
+        if distance - remaining > limit:
+            return None
+        rises = rises << 1 | 1
+        falls = falls << 1
+        up = (falls | ~(vertical | rises)) & mask
+        down = rises & vertical & mask
+    return distance if distance <= limit else None
@@ -0,0 +1,286 @@
+"""
+Batch and server query modes for degrees.py.
+
+Queries are lines of text, either JSON objects such as
+`{"source": "Kevin Bacon", "target": "Tom Hanks"}` or CSV rows of two
+names. Every query is answered with one line of JSON, in input order.
+Unknown names are answered with spelling suggestions, or resolved to
+the best suggestion if a JSON query sets `"fuzzy": true`. With stats
+enabled, each answer also carries the SearchStats of its search.
+"""
+
+import csv
+import json
+import os
+import signal
+import socketserver
+import stat
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import degrees
+
+# Number of queries allowed in flight per worker before reading more input
+QUEUE_DEPTH = 64
+
+
+def answer(line, stats=False):
+    """
+    Answers one query line and returns the result as a JSON string,
+    including search statistics if `stats` is True. A query that fails
+    is answered with an error rather than stopping the others.
+    """
+    try:
+        return answer_query(line, stats)
+    except Exception as error:
+        return json.dumps({"error": f"query failed: {error}"})
+
+
+def answer_query(line, stats=False):
+    """
+    Answers one query line as `answer` does, raising any unexpected
+    error.
+    """
+    try:
+        query = parse_query(line)
+    except ValueError as error:
+        return json.dumps({"error": str(error)})
+
+    result = {"source": query["source"], "target": query["target"]}
+    source = resolve(query, "source")
+    target = resolve(query, "target")
+    for key, person_id in (("source", source), ("target", target)):
+        if person_id is None:
+            matches = degrees.graph.people_named(query[key])
+            if len(matches) > 1:
+                result["error"] = f"{key} is ambiguous"
+                result["candidates"] = [
+                    degrees.graph.person_ids[person] for person in matches
+                ]
+            else:
+                result["error"] = f"{key} not found"
+                result["suggestions"] = [
+                    {"person_id": match, "person": degrees.person_name(match)}
+                    for match in degrees.suggest_names(query[key])
+                ]
+            return json.dumps(result)
+
+    search_stats = degrees.SearchStats() if stats else None
+    path = degrees.shortest_path(source, target, stats=search_stats)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {
+                "movie_id": movie_id,
+                "movie": degrees.movie_title(movie_id),
+                "person_id": person_id,
+                "person": degrees.person_name(person_id),
+            }
+            for movie_id, person_id in path
+        ]
+    if search_stats is not None:
+        result["stats"] = search_stats.as_dict()
+    return json.dumps(result)
+
+
+def parse_query(line):
+    """
+    Returns a dictionary with the source and target of a query line,
+    plus `source_id` and `target_id` if a JSON query names IMDB ids.
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            query = json.loads(line)
+        except json.JSONDecodeError:
+            raise ValueError("invalid JSON query")
+        if not isinstance(query, dict):
+            raise ValueError("query must be a JSON object")
+        for key in ("source", "target"):
+            person_id = query.get(f"{key}_id")
+            if person_id is not None and (
+                not isinstance(person_id, (str, int))
+                or isinstance(person_id, bool)
+            ):
+                raise ValueError(f"{key}_id must be a string or a number")
+            if key not in query:
+                query[key] = "" if person_id is None else str(person_id)
+            if not isinstance(query[key], str):
+                raise ValueError(f"{key} must be a string")
+    else:
+        row = next(csv.reader([line]), [])
+        if len(row) != 2:
+            raise ValueError("query must have a source and a target")
+        query = {"source": row[0].strip(), "target": row[1].strip()}
+    return query
+
+
+def resolve(query, key):
+    """
+    Returns the IMDB id for the `key` endpoint of a query, or None if
+    its name is unknown or ambiguous. Unknown names of fuzzy queries
+    resolve to the closest spelling suggestion.
+    """
+    person_id = query.get(f"{key}_id")
+    if person_id is not None:
+        if degrees.graph.person_index(str(person_id)) is None:
+            return None
+        return str(person_id)
+    name = str(query[key])
+    person_id = degrees.person_id_for_name(name, interactive=False)
+    if person_id is None and query.get("fuzzy") and (
+        not degrees.graph.people_named(name)
+    ):
+        suggestions = degrees.suggest_names(name, limit=1)
+        if suggestions:
+            person_id = suggestions[0]
+    return person_id
+
+
+def run_batch(directory, filename, workers, landmarks=degrees.LANDMARKS,
+              stats=False):
+    """
+    Answers every query in `filename` (or stdin for '-') and streams
+    the results to stdout.
+    """
+    if filename == "-":
+        run_queries(
+            directory, sys.stdin, sys.stdout, workers, landmarks, stats
+        )
+    else:
+        with open(filename, encoding="utf-8") as f:
+            run_queries(directory, f, sys.stdout, workers, landmarks, stats)
+
+
+def run_queries(directory, lines, output, workers,
+                landmarks=degrees.LANDMARKS, stats=False):
+    """
+    Answers each non-blank line of `lines`, writing results to `output`
+    in input order while up to `workers` processes search in parallel.
+    """
+    pool = start_pool(directory, workers, landmarks)
+    pending = deque()
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            pending.append(submit(pool, line, stats))
+            while len(pending) > QUEUE_DEPTH * workers or (
+                pending and pending[0].done()
+            ):
+                output.write(pending.popleft().result() + "\n")
+        while pending:
+            output.write(pending.popleft().result() + "\n")
+        output.flush()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def serve(directory, path, workers, landmarks=degrees.LANDMARKS,
+          stats=False):
+    """
+    Listens on the Unix socket `path` and answers query lines from any
+    number of concurrent clients until interrupted. A socket left at
+    `path` by an earlier server is replaced, but anything else there is
+    an error.
+    """
+    try:
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            sys.exit(f"{path} exists and is not a socket.")
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    pool = start_pool(directory, workers, landmarks)
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            # Reply in order from a separate thread, so a client can
+            # pipeline queries without waiting for each answer
+            pending = deque()
+            ready = threading.Condition()
+            finished = False
+
+            def reply():
+                while True:
+                    with ready:
+                        while not pending and not finished:
+                            ready.wait()
+                        if not pending:
+                            return
+                        future = pending.popleft()
+                    result = future.result() + "\n"
+                    try:
+                        self.wfile.write(result.encode("utf-8"))
+                        self.wfile.flush()
+                    except OSError:
+                        return
+
+            writer = threading.Thread(target=reply, daemon=True)
+            writer.start()
+            for line in self.rfile:
+                line = line.decode("utf-8", errors="replace")
+                if not line.strip():
+                    continue
+                with ready:
+                    pending.append(submit(pool, line, stats))
+                    ready.notify()
+            with ready:
+                finished = True
+                ready.notify()
+            writer.join()
+
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    bound = os.lstat(path)
+
+    # Shut down cleanly on SIGTERM as well as Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Serving on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        # Remove the socket only if it is still the one bound here
+        try:
+            if os.path.samestat(os.lstat(path), bound):
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def start_pool(directory, workers, landmarks=degrees.LANDMARKS):
+    """
+    Loads the dataset and returns a process pool whose workers have it
+    loaded too, or None to answer queries in this process.
+    """
+    degrees.load_data(directory, landmarks)
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=degrees.load_data,
+        initargs=(directory, landmarks)
+    )
+
+
+def submit(pool, line, stats=False):
+    """
+    Schedules `line` to be answered and returns a future for the result.
+    """
+    if pool is not None:
+        return pool.submit(answer, line, stats)
+    future = Future()
+    future.set_result(answer(line, stats))
+    return future
@@ -1,3 +1,8 @@
+import json
+import time
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +30,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._forget(node)
             return node
 
+    def _forget(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +48,55 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._forget(node)
             return node
+
+
+class SearchStats():
+    """
+    Counters and timings for one search, filled in when passed as the
+    `stats` argument of a search. If `callback` is given, it is called
+    with the stats once the search finishes.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.method = None
+        self.nodes_expanded = 0
+        self.frontier_peak = 0
+        self.neighbor_time = 0.0
+        self.total_time = 0.0
+        self.path_length = None
+        self._started = None
+
+    def start(self, method):
+        self.method = method
+        self.nodes_expanded = 0
+        self.frontier_peak = 0
+        self.neighbor_time = 0.0
+        self.total_time = 0.0
+        self.path_length = None
+        self._started = time.perf_counter()
+
+    def finish(self, path):
+        self.total_time = time.perf_counter() - self._started
+        self.path_length = None if path is None else len(path)
+        if self.callback is not None:
+            self.callback(self)
+
+    def frontier(self, size):
+        self.frontier_peak = max(self.frontier_peak, size)
+
+    def as_dict(self):
+        return {
+            "method": self.method,
+            "nodes_expanded": self.nodes_expanded,
+            "frontier_peak": self.frontier_peak,
+            "neighbor_time": self.neighbor_time,
+            "total_time": self.total_time,
+            "path_length": self.path_length,
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
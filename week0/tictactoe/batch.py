@@ -0,0 +1,182 @@
+"""
+Tic Tac Toe functions for batches of boards, using NumPy
+
+A batch is an int8 array of shape (N, 3, 3) or (N, 9), with 1 for X,
+-1 for O and 0 for an empty cell. Results are arrays of length N, with
+players and winners encoded the same way (0 for no winner).
+
+Usage: python batch.py [N], to check every function against
+tictactoe.py and time them on N random boards.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import bitboard
+import tictactoe as ttt
+
+# Cell values in a batch
+X = 1
+O = -1
+EMPTY = 0
+
+# Bit of each cell in a bitboard mask
+BITS = (1 << np.arange(9)).astype(np.int32)
+
+# WINS[mask] is True if the cells in `mask` complete a line
+WINS = np.frombuffer(bitboard.WINS, dtype=np.uint8).astype(bool)
+
+# POPCOUNT[mask] is the number of cells in `mask`
+POPCOUNT = np.array(
+    [mask.bit_count() for mask in range(bitboard.FULL + 1)], dtype=np.int8
+)
+
+# Minimax value of every board, indexed by x | o << 9; built on first use
+values_table = None
+
+
+def encode(boards):
+    """
+    Returns a batch for a list of boards in list-of-lists format.
+    """
+    marks = {bitboard.X: X, bitboard.O: O, bitboard.EMPTY: EMPTY}
+    return np.array(
+        [[marks[cell] for row in board for cell in row] for board in boards],
+        dtype=np.int8
+    ).reshape(-1, 9)
+
+
+def masks(boards):
+    """
+    Returns the (x, o) bitboard masks of a batch as int32 arrays.
+    """
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 9)
+    x = (boards == X).astype(np.int32) @ BITS
+    o = (boards == O).astype(np.int32) @ BITS
+    return x, o
+
+
+def players(boards):
+    """
+    Returns the player to move on each board.
+    """
+    x, o = masks(boards)
+    return np.where(POPCOUNT[x] == POPCOUNT[o], X, O).astype(np.int8)
+
+
+def winners(boards):
+    """
+    Returns the winner of each board, or 0 where there is none.
+    """
+    x, o = masks(boards)
+    return np.where(WINS[x], X, np.where(WINS[o], O, 0)).astype(np.int8)
+
+
+def terminal(boards):
+    """
+    Returns True for each board where the game is over.
+    """
+    x, o = masks(boards)
+    return WINS[x] | WINS[o] | ((x | o) == bitboard.FULL)
+
+
+def values(boards):
+    """
+    Returns the minimax value of each board: 1 if X wins with best
+    play, -1 if O does, 0 for a tie.
+    """
+    global values_table
+    if values_table is None:
+        values_table = solve_all()
+    x, o = masks(boards)
+    return values_table[x | o << 9]
+
+
+def solve_all():
+    """
+    Returns an int8 array holding the minimax value of every board
+    with no cell marked twice, indexed by x | o << 9.
+    """
+    table = np.zeros(1 << 18, dtype=np.int8)
+
+    # Every board, fullest first, so each board's children are solved
+    # before it is
+    boards = [0]
+    for cell in range(9):
+        boards = [
+            board
+            for mask in boards
+            for board in (mask, mask | 1 << cell, mask | 1 << (cell + 9))
+        ]
+    boards.sort(key=lambda key: key.bit_count(), reverse=True)
+
+    for key in boards:
+        x, o = key & bitboard.FULL, key >> 9
+        if bitboard.terminal(x, o):
+            table[key] = bitboard.utility(x, o)
+            continue
+        children = [
+            table[child_x | child_o << 9]
+            for child_x, child_o in (
+                bitboard.play(x, o, cell) for cell in bitboard.actions(x, o)
+            )
+        ]
+        if bitboard.player(x, o) == bitboard.X:
+            table[key] = max(children)
+        else:
+            table[key] = min(children)
+    return table
+
+
+def check(size):
+    """
+    Checks the batch functions against tictactoe.py on every reachable
+    board, then prints how fast they score `size` random boards.
+    """
+    reachable = []
+    stack = [ttt.initial_state()]
+    seen = set()
+    while stack:
+        board = stack.pop()
+        key = bitboard.from_board(board)
+        if key in seen:
+            continue
+        seen.add(key)
+        reachable.append(board)
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+
+    batch = encode(reachable)
+    marks = {ttt.X: X, ttt.O: O, None: 0}
+    expected = {
+        "players": [marks[ttt.player(board)] for board in reachable],
+        "winners": [marks[ttt.winner(board)] for board in reachable],
+        "terminal": [ttt.terminal(board) for board in reachable],
+        "values": [
+            ttt.utility(board) if ttt.terminal(board)
+            else ttt.maxValue(board) if ttt.player(board) == ttt.X
+            else ttt.minValue(board)
+            for board in reachable
+        ],
+    }
+    for name, function in (("players", players), ("winners", winners),
+                           ("terminal", terminal), ("values", values)):
+        if not np.array_equal(function(batch), expected[name]):
+            raise Exception(f"{name} disagrees with tictactoe.py")
+    print(f"Checked {len(reachable)} reachable boards")
+
+    rng = np.random.default_rng(0)
+    boards = rng.integers(-1, 2, size=(size, 9), dtype=np.int8)
+    for name, function in (("players", players), ("winners", winners),
+                           ("terminal", terminal), ("values", values)):
+        start = time.perf_counter()
+        function(boards)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {size / elapsed:,.0f} boards per second")
+
+
+if __name__ == "__main__":
+    check(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,141 @@
+"""
+Tic Tac Toe boards as bitmasks
+
+A board is a pair of 9-bit masks (x, o), one per player, where bit
+3 * i + j is set if that player has a mark in row i, column j.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Mask of every cell of the board
+FULL = 0b111111111
+
+# Masks of the rows, columns and diagonals
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# WINS[mask] is 1 if the cells in `mask` complete a line
+WINS = bytes(
+    any(mask & line == line for line in LINES) for mask in range(FULL + 1)
+)
+
+# The 8 symmetries of the board, as maps from (i, j) to where that
+# cell ends up: the 4 rotations, each with and without a mirror image
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (2 - j, 2 - i),
+]
+
+# PERMUTATIONS[s][k] is the cell that symmetry s moves to cell k
+PERMUTATIONS = []
+for symmetry in SYMMETRIES:
+    permutation = [0] * 9
+    for cell in range(9):
+        i, j = symmetry(*divmod(cell, 3))
+        permutation[3 * i + j] = cell
+    PERMUTATIONS.append(permutation)
+
+# TRANSFORMS[s][mask] is `mask` with symmetry s applied
+TRANSFORMS = [
+    [sum(1 << k for k in range(9) if mask >> permutation[k] & 1)
+     for mask in range(FULL + 1)]
+    for permutation in PERMUTATIONS
+]
+
+
+def from_board(board):
+    """
+    Returns the (x, o) masks of a board in list-of-lists format.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the board with masks (x, o) in list-of-lists format.
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def player(x, o):
+    """
+    Returns the player who has the next turn.
+    """
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def actions(x, o):
+    """
+    Returns the empty cells of the board, as bit indices.
+    """
+    free = ~(x | o) & FULL
+    return [cell for cell in range(9) if free >> cell & 1]
+
+
+def play(x, o, cell):
+    """
+    Returns the masks after the player to move marks bit index `cell`.
+    """
+    if x.bit_count() == o.bit_count():
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return bool(WINS[x] or WINS[o]) or x | o == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+def canonical(x, o):
+    """
+    Returns (key, s), where key = x | o << 9 is the smallest key of the
+    board under any of its symmetries and s is a symmetry reaching it.
+    Cell k of the canonical board is cell PERMUTATIONS[s][k] of (x, o).
+    """
+    return min(
+        (transform[x] | transform[o] << 9, s)
+        for s, transform in enumerate(TRANSFORMS)
+    )
@@ -0,0 +1,585 @@
+"""
+m,n,k-game Player
+
+Tic Tac Toe generalised to boards of m rows and n columns won by k in a
+row. Boards use the same list-of-lists format as tictactoe.py, and the
+search works on bitmasks with bit n * i + j for row i, column j.
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position; heuristic scores always stay far below it,
+# and scores beyond half of it are wins a number of moves away
+WIN = 10 ** 9
+
+# Whether a transposition table value is exact or only a bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Default number of processes for parallel_search
+WORKERS = os.cpu_count() or 1
+
+# In worker processes of a pool from start_pool: the game to search,
+# and the best root score found so far in the current pass, shared by
+# every worker
+worker_game = None
+shared_alpha = None
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search when its time budget runs out or it is
+    cancelled.
+    """
+
+
+class Game():
+    """
+    An m,n,k-game: players take turns marking cells of an m by n board,
+    and the first to mark k cells in a row, column or diagonal wins.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if not 1 <= k <= max(m, n):
+            raise Exception("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.cells = m * n
+        self.full = (1 << self.cells) - 1
+
+        # Every run of k cells as a mask, and the runs through each cell
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(sum(
+                            1 << (n * (i + di * step) + j + dj * step)
+                            for step in range(k)
+                        ))
+        self.lines_through = [
+            [line for line in self.lines if line >> cell & 1]
+            for cell in range(self.cells)
+        ]
+
+        # Cells nearest the center first, since they lie on most lines
+        self.move_order = sorted(
+            range(self.cells),
+            key=lambda cell: (
+                abs(cell // n - (m - 1) / 2) + abs(cell % n - (n - 1) / 2),
+                cell
+            )
+        )
+
+        # Heuristic score of a line holding only one player's marks,
+        # indexed by how many of them there are
+        self.weights = [0] + [4 ** count for count in range(1, k)] + [WIN]
+
+        # Maps (mover, other) bitboard keys to (depth, value, bound,
+        # best cell, heuristic) from earlier searches
+        self.transpositions = {}
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.from_board(board)
+        return X if x.bit_count() == o.bit_count() else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j) for i in range(self.m) for j in range(self.n)
+            if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise Exception("invalid action")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.from_board(board)
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.from_board(board)
+        return self.has_line(x) or self.has_line(o) or x | o == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board, budget=None, max_depth=None, cancel=None,
+                progress=None):
+        """
+        Returns the best action found for the current player on the
+        board, or None if the game is over.
+
+        The search deepens one move at a time until it sees the end of
+        the game, reaches `max_depth` moves, runs out of `budget`
+        seconds or sees `cancel` set, and plays the best move of the
+        deepest finished pass. After each pass it calls `progress`, if
+        given, with that pass's best action.
+        """
+        x, o = self.from_board(board)
+        report = None
+        if progress is not None:
+            def report(cell, value, depth):
+                progress(divmod(cell, self.n))
+        cell, _, _ = self.search(x, o, budget, max_depth, cancel, report)
+        if cell is None:
+            return None
+        return divmod(cell, self.n)
+
+    def search(self, x, o, budget=None, max_depth=None, cancel=None,
+               progress=None):
+        """
+        Searches the position (x, o) by iterative deepening and returns
+        (cell, value, depth): the best cell found, its value for X and
+        the depth of the deepest finished pass. `progress`, if given, is
+        called with the same triple after each pass.
+
+        Values are WIN minus the number of moves to a win for X, the
+        negation of that for O, and a heuristic score in between when
+        a pass stopped before the end of the game.
+        """
+        if self.over(x, o):
+            return None, self.score(x, o), 0
+        expired = expiry(
+            None if budget is None else time.perf_counter() + budget, cancel
+        )
+        if max_depth is None:
+            max_depth = self.cells - (x | o).bit_count()
+        sign = 1 if x.bit_count() == o.bit_count() else -1
+        mover, other = (x, o) if sign == 1 else (o, x)
+
+        best, value, depth = self.ordered_moves(mover, other)[0], None, 0
+        for limit in range(1, max_depth + 1):
+            try:
+                cell, score, heuristic = self.root(
+                    mover, other, limit, expired=expired
+                )
+            except Timeout:
+                break
+            best, value, depth = cell, sign * score, limit
+            if progress is not None:
+                progress(best, value, depth)
+            if not heuristic or abs(score) > WIN // 2:
+                break
+        if value is None:
+            value = sign * self.evaluate(mover, other)
+        return best, value, depth
+
+    def root(self, mover, other, depth, alpha=-math.inf, beta=math.inf,
+             expired=None):
+        """
+        Searches every move of the player to move `depth` moves deep and
+        returns (cell, score, heuristic) for the best one, scored for
+        that player. `heuristic` is True if any line of play was cut
+        short before the end of the game. Raises Timeout once
+        `expired`, a function from expiry, returns True.
+        """
+        entry = self.transpositions.get(mover | other << self.cells)
+        hint = None if entry is None else entry[3]
+        best, heuristic = None, False
+        for cell in self.ordered_moves(mover, other, hint):
+            score, cut = self.negamax(
+                other, mover | 1 << cell, cell, depth - 1, 1,
+                -beta, -alpha, expired
+            )
+            score = -score
+            heuristic = heuristic or cut
+            if best is None or score > alpha:
+                best, alpha = cell, max(alpha, score)
+        self.store(mover, other, depth, alpha, -math.inf, beta, best,
+                   heuristic, 0)
+        return best, alpha, heuristic
+
+    def negamax(self, mover, other, last, depth, ply, alpha, beta,
+                expired=None):
+        """
+        Returns (score, heuristic) for the player to move after `other`
+        marked cell `last`, searched `depth` moves deep, where `ply`
+        moves have been made since the root.
+        """
+        if expired is not None and expired():
+            raise Timeout
+
+        # The previous move may have ended the game
+        if any(other & line == line for line in self.lines_through[last]):
+            return ply - WIN, False
+        if mover | other == self.full:
+            return 0, False
+        if depth == 0:
+            return self.evaluate(mover, other), True
+
+        key = mover | other << self.cells
+        entry = self.transpositions.get(key)
+        hint = None
+        if entry is not None:
+            stored_depth, value, bound, hint, heuristic = entry
+            value = from_table(value, ply)
+            if stored_depth >= depth and (
+                bound == EXACT
+                or (bound == LOWER and value >= beta)
+                or (bound == UPPER and value <= alpha)
+            ):
+                return value, heuristic
+
+        lower = alpha
+        best, best_score, heuristic = None, -math.inf, False
+        for cell in self.ordered_moves(mover, other, hint):
+            score, cut = self.negamax(
+                other, mover | 1 << cell, cell, depth - 1, ply + 1,
+                -beta, -alpha, expired
+            )
+            score = -score
+            heuristic = heuristic or cut
+            if score > best_score:
+                best, best_score = cell, score
+            if score >= beta:
+                break
+            alpha = max(alpha, score)
+        self.store(mover, other, depth, best_score, lower, beta, best,
+                   heuristic, ply)
+        return best_score, heuristic
+
+    def store(self, mover, other, depth, value, alpha, beta, best,
+              heuristic, ply):
+        """
+        Records the value searched for a position with an (alpha, beta)
+        window in the transposition table.
+        """
+        if value <= alpha:
+            bound = UPPER
+        elif value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[mover | other << self.cells] = (
+            depth, to_table(value, ply), bound, best, heuristic
+        )
+
+    def ordered_moves(self, mover, other, first=None):
+        """
+        Returns the empty cells, trying `first` and then the cells
+        nearest the center before the rest.
+        """
+        taken = mover | other
+        moves = [cell for cell in self.move_order if not taken >> cell & 1]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def evaluate(self, mover, other):
+        """
+        Returns a heuristic score of a position for the player to move:
+        the weights of the lines only they could still complete, less
+        those of the lines only their opponent could.
+        """
+        weights = self.weights
+        score = 0
+        for line in self.lines:
+            mine = mover & line
+            theirs = other & line
+            if not theirs:
+                score += weights[mine.bit_count()]
+            elif not mine:
+                score -= weights[theirs.bit_count()]
+        return score
+
+    def has_line(self, mask):
+        """
+        Returns True if `mask` marks every cell of some line.
+        """
+        return any(mask & line == line for line in self.lines)
+
+    def over(self, x, o):
+        """
+        Returns True if the game on bitboard (x, o) is over.
+        """
+        return self.has_line(x) or self.has_line(o) or x | o == self.full
+
+    def score(self, x, o):
+        """
+        Returns the value for X of a finished game on bitboard (x, o).
+        """
+        if self.has_line(x):
+            return WIN
+        if self.has_line(o):
+            return -WIN
+        return 0
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) bitmasks of a board in list-of-lists format.
+        """
+        x = o = 0
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] == X:
+                    x |= 1 << (self.n * i + j)
+                elif board[i][j] == O:
+                    o |= 1 << (self.n * i + j)
+        return x, o
+
+
+def expiry(deadline=None, cancel=None):
+    """
+    Returns a function telling whether a search must stop: once the
+    perf_counter() time `deadline` passes, or once `cancel`, an event
+    such as threading.Event, is set. Returns None if neither is given.
+
+    Each search keeps its own, so searches of one game running in
+    different threads stop independently.
+    """
+    if deadline is None and cancel is None:
+        return None
+
+    def expired():
+        if cancel is not None and cancel.is_set():
+            return True
+        return deadline is not None and time.perf_counter() > deadline
+    return expired
+
+
+def to_table(value, ply):
+    """
+    Returns a score found `ply` moves from the root as stored in the
+    transposition table, where wins count moves from the position itself.
+    """
+    if value > WIN // 2:
+        return value + ply
+    if value < -WIN // 2:
+        return value - ply
+    return value
+
+
+def from_table(value, ply):
+    """
+    Returns a score from the transposition table as seen `ply` moves
+    from the root.
+    """
+    if value > WIN // 2:
+        return value - ply
+    if value < -WIN // 2:
+        return value + ply
+    return value
+
+
+class SearchPool():
+    """
+    Worker processes for parallel_search, and the best root score found
+    so far in the current pass, shared by every worker.
+    """
+
+    def __init__(self, executor, alpha):
+        self.executor = executor
+        self.alpha = alpha
+
+    def shutdown(self):
+        """
+        Stops the worker processes.
+        """
+        self.executor.shutdown()
+
+
+def start_pool(game, workers=WORKERS):
+    """
+    Returns a SearchPool of `workers` processes for parallel_search,
+    each with its own copy of `game` and its transposition table.
+    """
+    alpha = multiprocessing.Value("q", -2 * WIN)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=start_worker,
+        initargs=(game.m, game.n, game.k, alpha)
+    )
+    return SearchPool(executor, alpha)
+
+
+def start_worker(m, n, k, alpha):
+    """
+    Sets up a worker process of a pool from start_pool.
+    """
+    global worker_game, shared_alpha
+    worker_game = Game(m, n, k)
+    shared_alpha = alpha
+
+
+def parallel_search(pool, game, x, o, budget=None, max_depth=None):
+    """
+    Searches the position (x, o) of `game` like Game.search, but splits
+    the moves of each pass across the processes of `pool`, a SearchPool
+    from start_pool.
+
+    Workers share the best score found so far in a pass, so each root
+    move is searched only far enough to show whether it beats the moves
+    already finished. Results are merged in move order rather than in
+    the order workers finish, so without a budget the answer does not
+    depend on timing.
+    """
+    if game.over(x, o):
+        return None, game.score(x, o), 0
+    deadline = None if budget is None else time.time() + budget
+    if max_depth is None:
+        max_depth = game.cells - (x | o).bit_count()
+    sign = 1 if x.bit_count() == o.bit_count() else -1
+    mover, other = (x, o) if sign == 1 else (o, x)
+
+    moves = game.ordered_moves(mover, other)
+    best, value, depth = moves[0], None, 0
+    for limit in range(1, max_depth + 1):
+        pool.alpha.value = -2 * WIN
+        futures = [
+            pool.executor.submit(
+                search_move, mover, other, cell, limit, deadline
+            )
+            for cell in moves
+        ]
+        results = [future.result() for future in futures]
+        if None in results:
+            break
+
+        # Keep the move nearest the center among the best, and try the
+        # best moves first next pass
+        scores = {cell: score for cell, score, _ in results}
+        score = max(scores.values())
+        cell = min(
+            (move for move in moves if scores[move] == score),
+            key=game.move_order.index
+        )
+        best, value, depth = cell, sign * score, limit
+        moves.sort(key=lambda move: -scores[move])
+        if not any(cut for _, _, cut in results) or abs(score) > WIN // 2:
+            break
+    if value is None:
+        value = sign * game.evaluate(mover, other)
+    return best, value, depth
+
+
+def search_move(mover, other, cell, depth, deadline):
+    """
+    Searches root move `cell` `depth` moves deep in a worker process
+    and returns (cell, score, heuristic), or None if `deadline`, a
+    time.time() value, passes first.
+
+    Scores below the pass's best so far are only upper bounds, but any
+    score at least as good is exact, so ties are seen as ties.
+    """
+    expired = expiry(
+        None if deadline is None
+        else time.perf_counter() + deadline - time.time()
+    )
+    alpha = shared_alpha.value
+    try:
+        score, cut = worker_game.negamax(
+            other, mover | 1 << cell, cell, depth - 1, 1,
+            -math.inf, 1 - alpha, expired
+        )
+    except Timeout:
+        return None
+    score = -score
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return cell, score, cut
+
+
+def benchmark(m, n, k, workers, max_depth, positions):
+    """
+    Times serial and parallel searches of `positions` opening moves
+    on an m by n board, checking that both agree on every value.
+    """
+    game = Game(m, n, k)
+    openings = [(0, 0)] + [
+        (1 << cell, 0) for cell in game.move_order[:positions - 1]
+    ]
+    pool = start_pool(game, workers)
+    try:
+        # Start the workers before timing anything
+        list(pool.executor.map(abs, range(workers)))
+
+        serial_game = Game(m, n, k)
+        serial = parallel = 0
+        for x, o in openings:
+            start = time.perf_counter()
+            expected = serial_game.search(x, o, max_depth=max_depth)
+            serial += time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = parallel_search(pool, game, x, o, max_depth=max_depth)
+            parallel += time.perf_counter() - start
+
+            if found[1] != expected[1]:
+                raise Exception(f"parallel search disagrees: {found} "
+                                f"!= {expected}")
+    finally:
+        pool.shutdown()
+    print(f"{m}x{n}, {k} in a row, depth {max_depth}, "
+          f"{len(openings)} positions")
+    print(f"serial:   {serial:.2f} s")
+    print(f"parallel: {parallel:.2f} s with {workers} workers "
+          f"({serial / parallel:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark parallel m,n,k-game search"
+    )
+    parser.add_argument("-m", type=int, default=4, help="rows")
+    parser.add_argument("-n", type=int, default=4, help="columns")
+    parser.add_argument("-k", type=int, default=4, help="marks in a row")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="number of worker processes")
+    parser.add_argument("--depth", type=int, default=7,
+                        help="moves to search ahead")
+    parser.add_argument("--positions", type=int, default=3,
+                        help="number of opening positions to search")
+    args = parser.parse_args()
+    benchmark(args.m, args.n, args.k, args.workers, args.depth,
+              args.positions)
+
+
+if __name__ == "__main__":
+    main()
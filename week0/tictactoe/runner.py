@@ -1,7 +1,9 @@
 import pygame
 import sys
+import threading
 import time
 
+import mnk
 import tictactoe as ttt
 
 pygame.init()
@@ -17,9 +19,47 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Frames drawn per second
+FPS = 30
+
+# Seconds the computer may think before it plays its best move so far,
+# or None to let it search to the end of the game
+MOVE_BUDGET = None
+
+clock = pygame.time.Clock()
+engine = mnk.Game()
+
+
+def start_thinking(board):
+    """
+    Starts searching for the computer's move on `board` in a background
+    thread and returns the job: its "done" event is set once "move"
+    holds the move to play, and setting its "cancel" event abandons it.
+
+    With no MOVE_BUDGET the move comes from ttt.minimax, which cannot be
+    interrupted: a cancelled job still searches to the end in its
+    thread, and only its move is discarded.
+    """
+    job = {"move": None, "done": threading.Event(),
+           "cancel": threading.Event()}
+
+    def think():
+        if MOVE_BUDGET is None:
+            move = ttt.minimax(board)
+        else:
+            move = engine.minimax(board, budget=MOVE_BUDGET,
+                                  cancel=job["cancel"])
+        if not job["cancel"].is_set():
+            job["move"] = move
+            job["done"].set()
+
+    threading.Thread(target=think, daemon=True).start()
+    return job
+
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+job = None
 
 while True:
 
@@ -102,21 +142,20 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (pygame.time.get_ticks() // 400 % 4)
+            title = f"Computer thinking{dots}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, without waiting for it to be found
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if job is None:
+                job = start_thinking(board)
+            elif job["done"].is_set():
+                board = ttt.result(board, job["move"])
+                job = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -139,8 +178,11 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    if job is not None:
+                        job["cancel"].set()
+                        job = None
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -0,0 +1,51 @@
+"""
+Solves every reachable Tic Tac Toe position and writes the optimal move
+and value of each to the table that tictactoe.py reads.
+
+Usage: python solve.py [output]
+"""
+
+import math
+import sys
+
+import bitboard
+import tictactoe as ttt
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else ttt.TABLE
+    table = solve()
+    ttt.save_table(path, table)
+    print(f"Solved {len(table)} positions into {path}")
+
+
+def solve():
+    """
+    Returns a dictionary from the canonical key of every reachable
+    position that is not over to (cell, value), where `cell` is an
+    optimal move on the canonical board.
+    """
+    table = {}
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if bitboard.terminal(x, o):
+            continue
+        key, symmetry = bitboard.canonical(x, o)
+        if key in table:
+            continue
+        canonical = bitboard.TRANSFORMS[symmetry]
+        cx, co = canonical[x], canonical[o]
+        cell = ttt.best_move(cx, co)
+        if bitboard.player(cx, co) == ttt.X:
+            value = ttt.max_value(cx, co, -math.inf, math.inf)
+        else:
+            value = ttt.min_value(cx, co, -math.inf, math.inf)
+        table[key] = (cell, value)
+        for move in bitboard.actions(x, o):
+            stack.append(bitboard.play(x, o, move))
+    return table
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,43 @@ Tic Tac Toe Player
 """
 
 import math
-import itertools
-import copy
+import os
+
+import bitboard
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Cells tried first by the search, as bitboard indices: center, then
+# corners, then edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Whether a transposition table value is exact or only a bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps boards, as x | o << 9 bitboard keys, to (value, bound) from
+# earlier searches; kept across calls so later moves of a game are
+# cheaper
+transpositions = {}
+
+# File of solved positions written by solve.py, next to this module
+TABLE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "solved.table"
+)
+
+# Bytes per entry of the solved table
+ENTRY_SIZE = 3
+
+# Move recorded for positions with no move to make
+NO_MOVE = 15
+
+# Maps canonical bitboard keys to (cell, value) once the solved table
+# has been read, or False if there is no table to read
+solved = None
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -23,20 +53,7 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    if board == initial_state():
-        return X
-    count_x = 0
-    count_O = 0
-    for row in range(3):
-        for col in range(3):
-            if board[row][col] == 'X':
-                count_x += 1
-            elif board[row][col] == 'O':
-                count_O += 1
-    if count_x > count_O:
-        return O
-    else:
-        return X
+    return bitboard.player(*bitboard.from_board(board))
 
 
 def actions(board):
@@ -56,117 +73,209 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    new_board = copy.deepcopy(board)
-    for row in range(3):
-        for column in range(3):
-            try:
-                if (row, column) == action:
-                    new_board[row][column] = player(new_board)
-            except Exception:
-                raise Exception
+    new_board = [row[:] for row in board]
+    row, column = action
+    if 0 <= row < 3 and 0 <= column < 3:
+        new_board[row][column] = player(board)
     return new_board
-    
+
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    # Check for horizontal winners
-    for row in board:
-        if row.count(row[0]) == len(row) and row[0] != None:
-            return row[0]
-
-    # Check for vertical winners
-    for col in range(3):
-        check = []
-        for row in board:
-            check.append(row[col])
-        if check.count(check[0]) == len(check) and check[0] != None:
-            return check[0]
-    
-    # / diagonal
-    diags = []
-    for idx, reverse_idx in enumerate(reversed(range(len(board)))):
-        diags.append(board[idx][reverse_idx])
-
-    if diags.count(diags[0]) == len(diags) and diags[0] != None:
-        return diags[0]
-    
-    # \ diagonal
-    diags = []
-    for ix in range(len(board)):
-        diags.append(board[ix][ix])
-
-    if diags.count(diags[0]) == len(diags) and diags[0] != None:
-        return diags[0]
-    return None
+    return bitboard.winner(*bitboard.from_board(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) != None:
-        return True
-    
-    for row in range(3):
-        for col in range(3):
-            if board[row][col] == None:
-                return False
-    return True
+    return bitboard.terminal(*bitboard.from_board(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return bitboard.utility(*bitboard.from_board(board))
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    if terminal(board) == True:
+    x, o = bitboard.from_board(board)
+    solution = lookup_solved(x, o)
+    if solution is not None:
+        cell = solution[0]
+    else:
+        cell = best_move(x, o)
+    if cell is None:
+        return None
+    return divmod(cell, 3)
+
+
+def lookup_solved(x, o):
+    """
+    Returns (cell, value) for a bitboard from the solved table, or None
+    if the position or the table is missing. The table is read on the
+    first call.
+    """
+    global solved
+    if solved is None:
+        solved = load_table(TABLE) or False
+    if not solved:
+        return None
+    key, symmetry = bitboard.canonical(x, o)
+    entry = solved.get(key)
+    if entry is None:
+        return None
+    cell, value = entry
+    if cell is not None:
+        cell = bitboard.PERMUTATIONS[symmetry][cell]
+    return cell, value
+
+
+def load_table(path):
+    """
+    Returns the solved positions stored at `path` as a dictionary from
+    canonical keys to (cell, value), or None if there is no table.
+
+    Each entry packs a key, the best cell to play and the minimax value
+    into ENTRY_SIZE little-endian bytes: key << 6 | cell << 2 | value + 1.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    table = {}
+    for start in range(0, len(data) - ENTRY_SIZE + 1, ENTRY_SIZE):
+        entry = int.from_bytes(data[start:start + ENTRY_SIZE], "little")
+        cell = entry >> 2 & 0xF
+        table[entry >> 6] = (
+            None if cell == NO_MOVE else cell, (entry & 0x3) - 1
+        )
+    return table
+
+
+def save_table(path, table):
+    """
+    Writes a dictionary from canonical keys to (cell, value) to `path`
+    in the format read by load_table.
+    """
+    with open(path, "wb") as f:
+        for key in sorted(table):
+            cell, value = table[key]
+            if cell is None:
+                cell = NO_MOVE
+            entry = key << 6 | cell << 2 | value + 1
+            f.write(entry.to_bytes(ENTRY_SIZE, "little"))
+
+
+def best_move(x, o):
+    """
+    Returns the optimal cell for the current player on a bitboard,
+    or None if the game is over.
+    """
+    if bitboard.terminal(x, o):
         return None
-    if player(board) == X:
-        possibilities = actions(board)
+    move = None
+    if bitboard.player(x, o) == X:
         best = -math.inf
-        for possibility in possibilities:
-            current = minValue(result(board, possibility))
+        for cell in ordered_actions(x, o):
+            current = min_value(*bitboard.play(x, o, cell), best, math.inf)
             if current > best:
                 best = current
-                action = possibility
-    elif player(board) == O:
-        possibilities = actions(board)
+                move = cell
+    else:
         best = math.inf
-        for possibility in possibilities:
-            current = maxValue(result(board,possibility))
+        for cell in ordered_actions(x, o):
+            current = max_value(*bitboard.play(x, o, cell), -math.inf, best)
             if current < best:
                 best = current
-                action = possibility
-    return action
- 
+                move = cell
+    return move
+
+
+def ordered_actions(x, o):
+    """
+    Returns the empty cells of a bitboard, most promising first.
+    """
+    taken = x | o
+    return [cell for cell in MOVE_ORDER if not taken >> cell & 1]
+
+
+def maxValue(state, alpha=-math.inf, beta=math.inf):
+    return max_value(*bitboard.from_board(state), alpha, beta)
+
 
+def minValue(state, alpha=-math.inf, beta=math.inf):
+    return min_value(*bitboard.from_board(state), alpha, beta)
 
-def maxValue(state):
-    if terminal(state):
-        return utility(state)
+
+def max_value(x, o, alpha, beta):
+    key = x | o << 9
+    cached = lookup(key, alpha, beta)
+    if cached is not None:
+        return cached
+    if bitboard.terminal(x, o):
+        return bitboard.utility(x, o)
     v = -math.inf
-    for action in actions(state):
-        v = max(v, minValue(result(state, action)))
+    lower = alpha
+    for cell in ordered_actions(x, o):
+        v = max(v, min_value(x | 1 << cell, o, alpha, beta))
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+    store(key, v, lower, beta)
     return v
 
 
-def minValue(state):
-    if terminal(state):
-        return utility(state)
+def min_value(x, o, alpha, beta):
+    key = x | o << 9
+    cached = lookup(key, alpha, beta)
+    if cached is not None:
+        return cached
+    if bitboard.terminal(x, o):
+        return bitboard.utility(x, o)
     v = math.inf
-    for action in actions(state):
-        v = min(v, maxValue(result(state, action)))
+    upper = beta
+    for cell in ordered_actions(x, o):
+        v = min(v, max_value(x, o | 1 << cell, alpha, beta))
+        if v <= alpha:
+            break
+        beta = min(beta, v)
+    store(key, v, alpha, upper)
     return v
+
+
+def lookup(key, alpha, beta):
+    """
+    Returns the value of a bitboard key from the transposition table
+    if it is known well enough for an (alpha, beta) window, else None.
+    """
+    entry = transpositions.get(key)
+    if entry is None:
+        return None
+    value, bound = entry
+    if (bound == EXACT
+            or (bound == LOWER and value >= beta)
+            or (bound == UPPER and value <= alpha)):
+        return value
+    return None
+
+
+def store(key, value, alpha, beta):
+    """
+    Records the value searched for a bitboard key with an
+    (alpha, beta) window in the transposition table.
+    """
+    if value <= alpha:
+        bound = UPPER
+    elif value >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    transpositions[key] = (value, bound)
@@ -0,0 +1,67 @@
+"""
+Times parallel_check from logic.py against checking every model in one
+process, on a random knowledge base that entails its query.
+
+Usage: python benchmark.py [--symbols N] [--workers W [W ...]]
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import wait
+
+from logic import (
+    WORKERS, And, Implication, Not, Or, Symbol, check_shard,
+    parallel_check, simplify, start_pool
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark parallel model checking"
+    )
+    parser.add_argument("--symbols", type=int, default=20,
+                        help="number of symbols in the knowledge base")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 2, 4, WORKERS],
+                        help="worker counts to time")
+    args = parser.parse_args()
+    benchmark(args.symbols, sorted(set(args.workers)))
+
+
+def benchmark(n, workers):
+    """Times parallel_check on a random knowledge base of n symbols
+    that entails its query, so every model must be checked."""
+    rng = random.Random(0)
+    symbols = [Symbol(f"P{i}") for i in range(n)]
+    knowledge = And(*[
+        Or(*[rng.choice([symbol, Not(symbol)])
+             for symbol in rng.sample(symbols, 3)])
+        for _ in range(2 * n)
+    ])
+    query = Implication(knowledge, Or(symbols[0], Not(symbols[0])))
+
+    start = time.perf_counter()
+    expected = check_shard(simplify(knowledge), [query],
+                           sorted(knowledge.symbols()), 0, n)
+    serial = time.perf_counter() - start
+    print(f"{n} symbols, {2 ** n} models")
+    print(f"serial:     {serial:.2f} s")
+    for count in workers:
+        executor = start_pool(count)
+        try:
+            # Processes are forked on demand, so keep one busy per worker
+            # to have all of them running before the clock starts
+            wait([executor.submit(time.sleep, 0.1) for _ in range(count)])
+            start = time.perf_counter()
+            result = parallel_check(executor, knowledge, [query], count)
+            elapsed = time.perf_counter() - start
+        finally:
+            executor.shutdown()
+        if result != expected:
+            raise Exception("parallel check disagrees with serial check")
+        print(f"{count} workers: {elapsed:.2f} s ({serial / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,89 @@
 import itertools
+import math
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+from sat import CNF, Solver
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Largest number of symbols model_check enumerates models for one at a
+# time, and with NumPy installed, the largest it checks all models of
+# at once; beyond these it asks a SAT solver instead
+ENUMERATION_LIMIT = 10
+VECTOR_LIMIT = 20
+
+# truth_table_check evaluates 2^CHUNK_BITS models at a time
+CHUNK_BITS = 18
+
+# Default number of processes for parallel_check, how many shards to
+# split models into per process, and how many models each shard checks
+# between looking at the stop flag
+WORKERS = os.cpu_count() or 1
+SHARDS_PER_WORKER = 4
+BLOCK = 4096
+
+# Event shared with the processes of the latest start_pool executor,
+# set once some shard has refuted every query so the others can stop
+stop_flag = None
+
+# Every sentence built so far and still in use, by constructor arguments
+interned = weakref.WeakValueDictionary()
+
+
+class Interned(type):
+    """Makes sentences built from the same arguments one shared object."""
+
+    def __call__(cls, *args, **kwargs):
+
+        # Conjunctions and disjunctions can be changed after they are
+        # built, so each must be a separate object
+        if cls.mutable or kwargs:
+            return super().__call__(*args, **kwargs)
+
+        # Arguments are symbol names or sentences, compared by identity:
+        # equal sentences that do not contain conjunctions or
+        # disjunctions are one object, so they share an entry
+        key = (cls,) + tuple(
+            arg if isinstance(arg, str) else id(arg) for arg in args
+        )
+        sentence = interned.get(key)
+        if sentence is None:
+            sentence = super().__call__(*args)
+            interned[key] = sentence
+        return sentence
+
+
+class Sentence(metaclass=Interned):
+
+    # Whether the sentence can change after it is built
+    mutable = False
+
+    # Whether no part of the sentence can change, so its hash, symbol
+    # set and formula are cached once first needed
+    _fixed = False
+    _hash = None
+    _symbols = None
+    _formula = None
 
+    def __reduce__(self):
+        """Rebuilds the sentence through its constructor when unpickled."""
+        return (type(self), self.arguments())
 
-class Sentence():
+    def arguments(self):
+        """Returns the constructor arguments of the sentence."""
+        return ()
+
+    @classmethod
+    def settled(cls, *operands):
+        """Checks that none of the operands can change any more."""
+        return all(operand._fixed for operand in operands)
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -15,6 +97,35 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def tseitin(self, cnf):
+        """Adds clauses defining the sentence to cnf, returns its literal."""
+        raise Exception("nothing to encode")
+
+    def code(self, slots):
+        """Returns Python code evaluating the sentence in a model."""
+        raise Exception("nothing to compile")
+
+    def vectorized(self, columns):
+        """Evaluates the sentence in many models at once."""
+
+        # columns maps each symbol to a boolean array or NumPy bool
+        # holding its value in every model
+        raise Exception("nothing to vectorize")
+
+    def compiled(self, symbols):
+        """Returns a function evaluating the sentence in a model."""
+
+        # Models are integers whose bit i is the value of symbols[i]
+        slots = {symbol: i for i, symbol in enumerate(symbols)}
+        try:
+            return eval(f"lambda model: {self.code(slots)}")
+        except (RecursionError, SyntaxError, MemoryError):
+
+            # Too deeply nested to compile, so evaluate the tree
+            return lambda model: self.evaluate({
+                symbol: model >> i & 1 for symbol, i in slots.items()
+            })
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -44,14 +155,23 @@ class Sentence():
 
 class Symbol(Sentence):
 
+    _fixed = True
+
     def __init__(self, name):
         self.name = name
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        if self._hash is None:
+            self._hash = hash(("symbol", self.name))
+        return self._hash
+
+    def arguments(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -68,17 +188,43 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def tseitin(self, cnf):
+        return cnf.variable(self.name)
+
+    def code(self, slots):
+        try:
+            return f"(model >> {slots[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def vectorized(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
+        self._fixed = Sentence.settled(operand)
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        if self._hash is not None:
+            return self._hash
+        value = hash(("not", hash(self.operand)))
+        if self._fixed:
+            self._hash = value
+        return value
+
+    def arguments(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -87,26 +233,53 @@ class Not(Sentence):
         return not self.operand.evaluate(model)
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+        if self._formula is not None:
+            return self._formula
+        formula = "¬" + Sentence.parenthesize(self.operand.formula())
+        if self._fixed:
+            self._formula = formula
+        return formula
 
     def symbols(self):
-        return self.operand.symbols()
+        if self._symbols is not None:
+            return set(self._symbols)
+        symbols = self.operand.symbols()
+        if self._fixed:
+            self._symbols = frozenset(symbols)
+        return symbols
+
+    def tseitin(self, cnf):
+        return -cnf.literal(self.operand)
+
+    def code(self, slots):
+        return f"(not {self.operand.code(slots)})"
+
+    def vectorized(self, columns):
+        return ~self.operand.vectorized(columns)
 
 
 class And(Sentence):
+
+    mutable = True
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
 
+    def arguments(self):
+        return tuple(self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -123,27 +296,58 @@ class And(Sentence):
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+        return " ∧ ".join(
+            [Sentence.parenthesize(conjunct.formula())
+             for conjunct in self.conjuncts]
+        )
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )
+
+    def tseitin(self, cnf):
+        literals = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        v = cnf.new_variable()
+        cnf.add(*[[-v, literal] for literal in literals])
+        cnf.add([v] + [-literal for literal in literals])
+        return v
+
+    def code(self, slots):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.code(slots) for conjunct in self.conjuncts
+        ) + ")"
+
+    def vectorized(self, columns):
+        return reduce(np.logical_and, (
+            conjunct.vectorized(columns) for conjunct in self.conjuncts
+        ), np.True_)
 
 
 class Or(Sentence):
+
+    mutable = True
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
 
+    def arguments(self):
+        return tuple(self.disjuncts)
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -154,11 +358,34 @@ class Or(Sentence):
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+        return " ∨  ".join(
+            [Sentence.parenthesize(disjunct.formula())
+             for disjunct in self.disjuncts]
+        )
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )
+
+    def tseitin(self, cnf):
+        literals = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        v = cnf.new_variable()
+        cnf.add(*[[v, -literal] for literal in literals])
+        cnf.add([-v] + literals)
+        return v
+
+    def code(self, slots):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.code(slots) for disjunct in self.disjuncts
+        ) + ")"
+
+    def vectorized(self, columns):
+        return reduce(np.logical_or, (
+            disjunct.vectorized(columns) for disjunct in self.disjuncts
+        ), np.False_)
 
 
 class Implication(Sentence):
@@ -167,14 +394,25 @@ class Implication(Sentence):
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
+        self._fixed = Sentence.settled(antecedent, consequent)
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (isinstance(other, Implication)
+                                 and self.antecedent == other.antecedent
+                                 and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        if self._hash is not None:
+            return self._hash
+        value = hash(
+            ("implies", hash(self.antecedent), hash(self.consequent))
+        )
+        if self._fixed:
+            self._hash = value
+        return value
+
+    def arguments(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -184,12 +422,40 @@ class Implication(Sentence):
                 or self.consequent.evaluate(model))
 
     def formula(self):
+        if self._formula is not None:
+            return self._formula
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+        formula = f"{antecedent} => {consequent}"
+        if self._fixed:
+            self._formula = formula
+        return formula
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        if self._symbols is not None:
+            return set(self._symbols)
+        symbols = set.union(
+            self.antecedent.symbols(), self.consequent.symbols()
+        )
+        if self._fixed:
+            self._symbols = frozenset(symbols)
+        return symbols
+
+    def tseitin(self, cnf):
+        a = cnf.literal(self.antecedent)
+        b = cnf.literal(self.consequent)
+        v = cnf.new_variable()
+        cnf.add([-v, -a, b], [v, a], [v, -b])
+        return v
+
+    def code(self, slots):
+        antecedent = self.antecedent.code(slots)
+        consequent = self.consequent.code(slots)
+        return f"(not {antecedent} or {consequent})"
+
+    def vectorized(self, columns):
+        return (~self.antecedent.vectorized(columns)
+                | self.consequent.vectorized(columns))
 
 
 class Biconditional(Sentence):
@@ -198,14 +464,23 @@ class Biconditional(Sentence):
         Sentence.validate(right)
         self.left = left
         self.right = right
+        self._fixed = Sentence.settled(left, right)
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (isinstance(other, Biconditional)
+                                 and self.left == other.left
+                                 and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        if self._hash is not None:
+            return self._hash
+        value = hash(("biconditional", hash(self.left), hash(self.right)))
+        if self._fixed:
+            self._hash = value
+        return value
+
+    def arguments(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,47 +492,348 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
+        if self._formula is not None:
+            return self._formula
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+        formula = f"{left} <=> {right}"
+        if self._fixed:
+            self._formula = formula
+        return formula
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        if self._symbols is not None:
+            return set(self._symbols)
+        symbols = set.union(self.left.symbols(), self.right.symbols())
+        if self._fixed:
+            self._symbols = frozenset(symbols)
+        return symbols
 
+    def tseitin(self, cnf):
+        a = cnf.literal(self.left)
+        b = cnf.literal(self.right)
+        v = cnf.new_variable()
+        cnf.add([-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b])
+        return v
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def code(self, slots):
+        left = self.left.code(slots)
+        right = self.right.code(slots)
+        return f"((not {left}) == (not {right}))"
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    def vectorized(self, columns):
+        return self.left.vectorized(columns) == self.right.vectorized(columns)
 
-        # If model has an assignment for each symbol
-        if not symbols:
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
+    return model_check_many(knowledge, [query])[0]
+
+
+def model_check_many(knowledge, queries):
+    """Checks which of the queries the knowledge base entails."""
+
+    # Evaluate a simpler but equivalent knowledge base
+    knowledge = simplify(knowledge)
+
+    # Get all symbols in both knowledge and queries
+    symbols = set.union(
+        knowledge.symbols(), *[query.symbols() for query in queries]
+    )
+
+    # Too many models to enumerate one by one, so check them all at
+    # once or search for counterexamples
+    if len(symbols) > ENUMERATION_LIMIT:
+        if np is not None and len(symbols) <= VECTOR_LIMIT:
+            return truth_table_check(knowledge, queries)
+        return sat_check(knowledge, queries)
+
+    # Find the models of knowledge with compiled code, numbering the
+    # models 0 to 2^n - 1 so each symbol is one bit, then check that
+    # each query holds in all of them
+    symbols = sorted(symbols)
+    models = list(filter(
+        knowledge.compiled(symbols), range(2 ** len(symbols))
+    ))
+    return [all(map(query.compiled(symbols), models)) for query in queries]
+
+
+def sat_check(knowledge, queries):
+    """Checks which queries the knowledge base entails using SAT."""
+
+    # Knowledge entails a query if no model makes knowledge true and
+    # the query false. One solver answers every query, taking each
+    # query being false as an assumption in turn
+    cnf = CNF()
+    cnf.assert_true(knowledge)
+    literals = [cnf.literal(query) for query in queries]
+    solver = Solver(cnf.clauses)
+    entailed = [None] * len(queries)
+    for i, literal in enumerate(literals):
+        if entailed[i] is not None:
+            continue
+        model = solver.solve([-literal])
+        if model is None:
+            entailed[i] = True
+            continue
+
+        # The counterexample may refute other queries too
+        for j, other in enumerate(literals):
+            if model.get(abs(other), False) != (other > 0):
+                entailed[j] = False
+    return entailed
+
+
+def truth_table_check(knowledge, queries):
+    """Checks which queries the knowledge base entails using NumPy."""
+    if np is None:
+        raise Exception("truth_table_check requires NumPy")
+
+    # Model m gives symbol i the value of bit i of m. Models are checked
+    # a chunk at a time, and within a chunk the low bits vary while the
+    # high bits stay the same
+    symbols = sorted(set.union(
+        knowledge.symbols(), *[query.symbols() for query in queries]
+    ))
+    low = min(len(symbols), CHUNK_BITS)
+    models = np.arange(2 ** low, dtype=np.int64)
+    columns = {
+        symbol: (models >> i & 1).astype(bool)
+        for i, symbol in enumerate(symbols[:low])
+    }
+    entailed = [True] * len(queries)
+    for chunk in range(2 ** (len(symbols) - low)):
+        for i, symbol in enumerate(symbols[low:]):
+            columns[symbol] = np.bool_(chunk >> i & 1)
+        holds = knowledge.vectorized(columns)
+        for i, query in enumerate(queries):
+            if entailed[i] and np.any(holds & ~query.vectorized(columns)):
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def simplify(sentence, report=None):
+    """Returns a simpler sentence equivalent to the given one."""
+
+    # Sentences simplify to smaller sentences, or to True or False. And
+    # and Or are flattened and lose repeated and constant operands,
+    # double negations cancel, and operators with a constant operand
+    # reduce to their other operand
+    def reduced(sentence, facts):
+        if isinstance(sentence, Symbol):
+            return facts.get(sentence.name, sentence)
+
+        elif isinstance(sentence, Not):
+            operand = reduced(sentence.operand, facts)
+            if isinstance(operand, bool):
+                return not operand
+            if isinstance(operand, Not):
+                return operand.operand
+            return Not(operand)
+
+        elif isinstance(sentence, (And, Or)):
+            if isinstance(sentence, And):
+                kind, children, absorbing = And, sentence.conjuncts, False
+            else:
+                kind, children, absorbing = Or, sentence.disjuncts, True
+            operands = {}
+            for child in children:
+                child = reduced(child, facts)
+                if child is absorbing:
+                    return absorbing
+                if child is (not absorbing):
+                    continue
+                if isinstance(child, kind):
+                    parts = child.arguments()
+                else:
+                    parts = (child,)
+                for part in parts:
+                    operands[part] = None
+
+            # An operand and its negation together decide the result
+            for operand in operands:
+                if isinstance(operand, Not) and operand.operand in operands:
+                    return absorbing
+            if not operands:
+                return not absorbing
+            if len(operands) == 1:
+                return next(iter(operands))
+            return kind(*operands)
+
+        elif isinstance(sentence, Implication):
+            antecedent = reduced(sentence.antecedent, facts)
+            consequent = reduced(sentence.consequent, facts)
+            if antecedent is False or consequent is True:
+                return True
+            if antecedent is True:
+                return consequent
+            if consequent is False:
+                return reduced(Not(antecedent), {})
+            if antecedent == consequent:
+                return True
+            return Implication(antecedent, consequent)
+
+        elif isinstance(sentence, Biconditional):
+            left = reduced(sentence.left, facts)
+            right = reduced(sentence.right, facts)
+            if isinstance(left, bool):
+                left, right = right, left
+            if isinstance(right, bool):
+                if isinstance(left, bool):
+                    return left == right
+                return left if right else reduced(Not(left), {})
+            if left == right:
+                return True
+            return Biconditional(left, right)
+
+        raise Exception("nothing to simplify")
+
+    # Conjuncts that are symbols or negated symbols are facts. Each new
+    # fact is put into just the conjuncts that mention it, and that is
+    # repeated while it reveals new facts, so every conjunct is reduced
+    # again only when one of its symbols gets a value
+    def propagated(sentence):
+        facts = {}
+        conjuncts = []
+        mentions = {}
+        pending = []
+
+        # Records a conjunct, returning False if it contradicts a fact
+        def add(conjunct):
+            if isinstance(conjunct, And):
+                return all(add(part) for part in conjunct.conjuncts)
+            if isinstance(conjunct, Symbol):
+                name, value = conjunct.name, True
+            elif (isinstance(conjunct, Not)
+                  and isinstance(conjunct.operand, Symbol)):
+                name, value = conjunct.operand.name, False
+            else:
+                for symbol in conjunct.symbols():
+                    mentions.setdefault(symbol, []).append(len(conjuncts))
+                conjuncts.append(conjunct)
+                return True
+            if name not in facts:
+                facts[name] = value
+                pending.append(name)
+            return facts[name] == value
+
+        if not add(sentence):
+            return False
+        while pending:
+            touched = sorted({
+                index for name in pending for index in mentions.pop(name, ())
+            })
+            pending.clear()
+            for index in touched:
+                conjunct = conjuncts[index]
+                if conjunct is None:
+                    continue
+                conjuncts[index] = None
+                conjunct = reduced(conjunct, facts)
+                if conjunct is False:
+                    return False
+                if conjunct is not True and not add(conjunct):
+                    return False
+
+        units = [
+            Symbol(name) if value else Not(Symbol(name))
+            for name, value in facts.items()
+        ]
+        rest = [conjunct for conjunct in conjuncts if conjunct is not None]
+        return reduced(And(*units, *rest), {})
+
+    result = reduced(sentence, {})
+    if not isinstance(result, bool):
+        result = propagated(result)
+
+    # An empty conjunction is true, and an empty disjunction false
+    if result is True:
+        result = And()
+    elif result is False:
+        result = Or()
+    if report is not None:
+        report(size(sentence), size(result))
+    return result
+
+
+def size(sentence):
+    """Returns the number of operators and symbols in a sentence."""
+    if isinstance(sentence, Symbol):
+        return 1
+    return 1 + sum(size(operand) for operand in sentence.arguments())
+
+
+def start_pool(workers=WORKERS):
+    """Returns an executor of processes for parallel_check that share
+    stop_flag. Only the latest one can be used."""
+    global stop_flag
+    stop_flag = multiprocessing.Event()
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=share_stop_flag,
+        initargs=(stop_flag,)
+    )
+
+
+def share_stop_flag(flag):
+    """Makes flag the stop_flag of a process started by start_pool."""
+    global stop_flag
+    stop_flag = flag
+
+
+def parallel_check(executor, knowledge, queries, workers=WORKERS):
+    """Checks which queries the knowledge base entails, splitting the
+    models among the workers of an executor from start_pool."""
+
+    # Model m gives symbol i the value of bit i of m. Fixing the top k
+    # symbols splits the models into 2^k shards checked independently
+    knowledge = simplify(knowledge)
+    symbols = sorted(set.union(
+        knowledge.symbols(), *[query.symbols() for query in queries]
+    ))
+    split = min(
+        len(symbols), math.ceil(math.log2(workers * SHARDS_PER_WORKER))
+    )
+    low = len(symbols) - split
+    stop_flag.clear()
+    try:
+        futures = [
+            executor.submit(
+                check_shard, knowledge, queries, symbols, shard, low
+            )
+            for shard in range(2 ** split)
+        ]
+        results = [future.result() for future in futures]
+    finally:
+        # check_shard also reads the flag when called in this process
+        stop_flag.clear()
+
+    # A shard that stopped early did so because another refuted every
+    # query; otherwise a query is entailed if no shard refuted it
+    if None in results:
+        return [False] * len(queries)
+    return [all(result[i] for result in results)
+            for i in range(len(queries))]
+
+
+def check_shard(knowledge, queries, symbols, shard, low):
+    """Checks which queries hold in every model of knowledge whose bits
+    above the lowest `low` equal `shard`, or returns None if stopped."""
+    holds = knowledge.compiled(symbols)
+    checks = [query.compiled(symbols) for query in queries]
+    entailed = [True] * len(queries)
+    first = shard << low
+    last = first + 2 ** low
+    for start in range(first, last, BLOCK):
+        if stop_flag is not None and stop_flag.is_set():
+            return None
+        models = list(filter(holds, range(start, min(start + BLOCK, last))))
+        for i, check in enumerate(checks):
+            if entailed[i] and not all(map(check, models)):
+                entailed[i] = False
+        if not any(entailed):
+            if stop_flag is not None:
+                stop_flag.set()
+            return entailed
+    return entailed
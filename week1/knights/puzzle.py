@@ -1,3 +1,5 @@
+import sys
+
 from logic import *
 
 AKnight = Symbol("A is a Knight")
@@ -65,6 +67,9 @@ knowledge3 = And(
 
 
 def main():
+    # With -v, report how much simplifying shrinks each knowledge base
+    verbose = "-v" in sys.argv[1:]
+
     symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
     puzzles = [
         ("Puzzle 0", knowledge0),
@@ -77,8 +82,14 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            if verbose:
+                simplify(knowledge, report=lambda before, after: print(
+                    f"    Simplified {before} nodes to {after}",
+                    file=sys.stderr
+                ))
+            entailed = model_check_many(knowledge, symbols)
+            for symbol, known in zip(symbols, entailed):
+                if known:
                     print(f"    {symbol}")
 
 
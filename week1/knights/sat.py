@@ -0,0 +1,371 @@
+"""
+Conjunctive normal form and a DPLL satisfiability solver.
+
+Variables are positive integers and literals are signed integers: `v`
+is true when variable `v` is, and `-v` when it is not. A clause is a
+list of literals, at least one of which must be true.
+"""
+
+import heapq
+
+# Conflicts before the first restart, and how much longer each
+# following run of the search gets
+RESTART = 100
+RESTART_GROWTH = 1.5
+
+# Factor by which the activity of variables fades after each conflict
+ACTIVITY_DECAY = 0.95
+
+
+class CNF():
+    """
+    Clauses built from logical sentences by Tseitin encoding: every
+    compound subformula gets a variable that the clauses force to equal
+    its truth value, so the clauses grow linearly with the sentence.
+    """
+
+    def __init__(self):
+        self.clauses = []
+
+        # Variable of each symbol name, and literal of each subformula
+        self.variables = {}
+        self.literals = {}
+        self.count = 0
+
+    def variable(self, name):
+        """
+        Returns the variable of the symbol called `name`.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def new_variable(self):
+        """
+        Returns a variable not used so far.
+        """
+        self.count += 1
+        return self.count
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when `sentence` is,
+        adding the clauses that define it.
+        """
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.tseitin(self)
+        return self.literals[sentence]
+
+    def add(self, *clauses):
+        """
+        Adds clauses to the formula.
+        """
+        self.clauses.extend(clauses)
+
+    def assert_true(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be true.
+        """
+        self.add([self.literal(sentence)])
+
+    def assert_false(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be false.
+        """
+        self.add([-self.literal(sentence)])
+
+
+class Solver():
+    """
+    Conflict-driven clause learning: DPLL search with unit propagation
+    over two watched literals per clause, which learns a clause from
+    each conflict and jumps back to the decision it blames.
+
+    A clause is only visited when one of its two watched literals
+    becomes false, and watches need no undoing when backtracking.
+    Learned clauses follow from the others, so they are kept between
+    calls to `solve`.
+    """
+
+    def __init__(self, clauses=()):
+        self.clauses = []
+        self.watches = {}
+        self.units = []
+        self.conflict = False
+
+        # Decision heuristic: recent conflict involvement of each
+        # variable, and the value each variable last had
+        self.activity = {}
+        self.increment = 1.0
+        self.phases = {}
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause, given as an iterable of literals.
+        """
+        clause = list(dict.fromkeys(clause))
+        literals = set(clause)
+        if any(-literal in literals for literal in clause):
+            return
+        for literal in clause:
+            self.activity.setdefault(abs(literal), 0.0)
+        if not clause:
+            self.conflict = True
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """
+        Stores a clause of two or more literals, watching its first two,
+        and returns its index.
+        """
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def solve(self, assumptions=()):
+        """
+        Returns a model satisfying every clause and the `assumptions`
+        literals, as a dictionary from variables to booleans, or None
+        if there is none.
+        """
+        if self.conflict:
+            return None
+        assumptions = list(assumptions)
+        for literal in assumptions:
+            self.activity.setdefault(abs(literal), 0.0)
+
+        self.values = {}
+        self.levels = {}
+        self.reasons = {}
+        self.trail = []
+        self.head = 0
+
+        # Length of the trail when each decision level began
+        self.starts = []
+
+        # Unassigned variables by activity; stale entries are skipped
+        self.queue = [(-activity, v) for v, activity in self.activity.items()]
+        heapq.heapify(self.queue)
+
+        for literal in self.units:
+            if not self.assign(literal, None):
+                self.conflict = True
+                return None
+        if self.propagate() is not None:
+            self.conflict = True
+            return None
+
+        conflicts = 0
+        restart = RESTART
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.starts:
+                    self.conflict = True
+                    return None
+                conflicts += 1
+                learned, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.units.append(learned[0])
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.decay()
+                continue
+
+            if conflicts >= restart:
+                conflicts = 0
+                restart = int(restart * RESTART_GROWTH)
+                self.backjump(0)
+                continue
+
+            # Decide the assumptions first, each on a level of its own
+            if len(self.starts) < len(assumptions):
+                literal = assumptions[len(self.starts)]
+                value = self.value(literal)
+                if value is False:
+                    return None
+                self.starts.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick()
+            if variable is None:
+                return dict(self.values)
+            self.starts.append(len(self.trail))
+            if self.phases.get(variable, False):
+                self.assign(variable, None)
+            else:
+                self.assign(-variable, None)
+
+    def value(self, literal):
+        """
+        Returns whether `literal` is true, or None if it is unassigned.
+        """
+        value = self.values.get(abs(literal))
+        if value is None:
+            return None
+        return value == (literal > 0)
+
+    def assign(self, literal, reason):
+        """
+        Makes `literal` true because of clause `reason` (None for a
+        decision), returning False if it is already false.
+        """
+        value = self.value(literal)
+        if value is not None:
+            return value
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.starts)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+        return True
+
+    def pick(self):
+        """
+        Returns the unassigned variable with the highest activity, or
+        None if every variable is assigned.
+        """
+        while self.queue:
+            activity, variable = heapq.heappop(self.queue)
+            if (variable not in self.values
+                    and -activity == self.activity[variable]):
+                return variable
+        return None
+
+    def backjump(self, level):
+        """
+        Unassigns every literal assigned above decision level `level`.
+        """
+        if len(self.starts) <= level:
+            return
+        length = self.starts[level]
+        while len(self.trail) > length:
+            literal = self.trail.pop()
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            del self.values[variable]
+            heapq.heappush(self.queue, (-self.activity[variable], variable))
+        del self.starts[level:]
+        self.head = length
+
+    def propagate(self):
+        """
+        Assigns the literals forced by unit clauses, returning the index
+        of a clause that became false, or None.
+        """
+        clauses = self.clauses
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false)
+            if not watching:
+                continue
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                if self.value(clause[0]):
+                    kept.append(index)
+                    continue
+
+                # Watch another literal that is not false, if any
+                for i in range(2, len(clause)):
+                    if self.value(clause[i]) is not False:
+                        clause[1], clause[i] = clause[i], false
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if not self.assign(clause[0], index):
+                        kept.extend(watching[position + 1:])
+                        self.watches[false] = kept
+                        return index
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (clause, level): a clause learned from the conflicting
+        clause, whose first literal is the only one assigned at the
+        current level, and the level to jump back to so that literal
+        can be assigned.
+        """
+        level = len(self.starts)
+        learned = [None]
+        seen = set()
+        pending = 0
+        clause = self.clauses[conflict]
+        literal = None
+        position = len(self.trail) - 1
+        while True:
+            for other in clause if literal is None else clause[1:]:
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve with the reason of the latest literal involved,
+            # until only one literal of this level is left
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+        learned[0] = -literal
+
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal assigned latest besides the first
+        latest = max(
+            range(1, len(learned)),
+            key=lambda i: self.levels[abs(learned[i])]
+        )
+        learned[1], learned[latest] = learned[latest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        """
+        Raises the activity of a variable involved in a conflict.
+        """
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            for v in self.activity:
+                self.activity[v] *= 1e-100
+            self.increment *= 1e-100
+            self.queue = [
+                (-self.activity[v], v)
+                for v in self.activity if v not in self.values
+            ]
+            heapq.heapify(self.queue)
+        elif variable not in self.values:
+            heapq.heappush(self.queue, (-self.activity[variable], variable))
+
+    def decay(self):
+        """
+        Makes earlier conflicts count for less than later ones.
+        """
+        self.increment /= ACTIVITY_DECAY